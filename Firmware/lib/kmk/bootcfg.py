@@ -16,6 +16,7 @@ def bootcfg(
     cdc_console: bool = True,
     cdc_data: bool = False,
     consumer_control: bool = True,
+    hires_scroll: bool = False,
     keyboard: bool = True,
     midi: bool = True,
     mouse: bool = True,
@@ -83,7 +84,11 @@ def bootcfg(
         else:
             devices.append(usb_hid.Device.KEYBOARD)
     if mouse:
-        if pan:
+        if hires_scroll:
+            from kmk.hid_reports import pointer
+
+            devices.append(pointer.HIRES_POINTER)
+        elif pan:
             from kmk.hid_reports import pointer
 
             devices.append(pointer.POINTER)
@@ -15,7 +15,8 @@ class Extension:
 
         self.on_runtime_disable(keyboard)
 
-    # The below methods should be implemented by subclasses
+    # The below methods should be implemented by subclasses. The per-cycle
+    # hooks default to no-ops and are only dispatched to if overridden.
 
     def on_runtime_enable(self, keyboard):
         raise NotImplementedError
@@ -30,25 +31,25 @@ class Extension:
         '''
         Return value will be injected as an extra matrix update
         '''
-        raise NotImplementedError
+        return
 
     def after_matrix_scan(self, keyboard):
         '''
         Return value will be replace matrix update if supplied
         '''
-        raise NotImplementedError
+        return
 
     def before_hid_send(self, keyboard):
-        raise NotImplementedError
+        return
 
     def after_hid_send(self, keyboard):
-        raise NotImplementedError
+        return
 
     def on_powersave_enable(self, keyboard):
-        raise NotImplementedError
+        return
 
     def on_powersave_disable(self, keyboard):
-        raise NotImplementedError
+        return
 
     def deinit(self, keyboard):
         pass
@@ -214,12 +214,6 @@ class Display(Extension):
         if sandbox.matrix_update or sandbox.secondary_matrix_update:
             self.timer_start = ticks_ms()
 
-    def before_hid_send(self, sandbox):
-        return
-
-    def after_hid_send(self, sandbox):
-        return
-
     def on_powersave_enable(self, sandbox):
         self.powersave = True
 
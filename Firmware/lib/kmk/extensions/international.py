@@ -43,21 +43,3 @@ class International(Extension):
 
     def during_bootup(self, sandbox):
         return
-
-    def before_matrix_scan(self, sandbox):
-        return
-
-    def after_matrix_scan(self, sandbox):
-        return
-
-    def before_hid_send(self, sandbox):
-        return
-
-    def after_hid_send(self, sandbox):
-        return
-
-    def on_powersave_enable(self, sandbox):
-        return
-
-    def on_powersave_disable(self, sandbox):
-        return
@@ -9,6 +9,8 @@ debug = Debug(__name__)
 
 
 class LEDKey(Key):
+    __slots__ = ('leds', 'brightness')
+
     def __init__(self, *leds, brightness=None, **kwargs):
         super().__init__(**kwargs)
         self.leds = leds
@@ -72,21 +74,25 @@ class LED(Extension):
         make_argumented_key(
             names=('LED_TOG',),
             constructor=LEDKey,
+            intern=True,
             on_press=self._key_led_tog,
         )
         make_argumented_key(
             names=('LED_INC',),
             constructor=LEDKey,
+            intern=True,
             on_press=self._key_led_inc,
         )
         make_argumented_key(
             names=('LED_DEC',),
             constructor=LEDKey,
+            intern=True,
             on_press=self._key_led_dec,
         )
         make_argumented_key(
             names=('LED_SET',),
             constructor=led_set_key,
+            intern=True,
             on_press=self._key_led_set,
         )
         make_key(names=('LED_ANI',), on_press=self._key_led_ani)
@@ -122,24 +128,9 @@ class LED(Extension):
     def during_bootup(self, sandbox):
         return
 
-    def before_matrix_scan(self, sandbox):
-        return
-
-    def after_matrix_scan(self, sandbox):
-        return
-
-    def before_hid_send(self, sandbox):
-        return
-
     def after_hid_send(self, sandbox):
         self.animate()
 
-    def on_powersave_enable(self, sandbox):
-        return
-
-    def on_powersave_disable(self, sandbox):
-        return
-
     def _init_effect(self):
         self._pos = 0
         self._effect_init = False
@@ -2,6 +2,10 @@ import usb_hid
 from micropython import const
 
 from kmk.extensions import Extension
+from kmk.scheduler import cancel_task, create_task
+from kmk.utils import Debug, debug_error
+
+debug = Debug(__name__)
 
 _NUMLOCK = const(0x01)
 _CAPSLOCK = const(0x02)
@@ -10,11 +14,31 @@ _COMPOSE = const(0x08)
 _KANA = const(0x10)
 
 
+class Locks:
+    NUM_LOCK = _NUMLOCK
+    CAPS_LOCK = _CAPSLOCK
+    SCROLL_LOCK = _SCROLLLOCK
+    COMPOSE = _COMPOSE
+    KANA = _KANA
+
+
 class LockStatus(Extension):
-    def __init__(self):
+    '''
+    Tracks the host's lock LEDs. The keyboard's OUT report is polled every
+    `poll_interval` ms, and every change is published to the callbacks given
+    to `subscribe`, as `callback(lock_status, changed)`, where `changed` is a
+    mask of the `Locks` that toggled.
+    '''
+
+    def __init__(self, poll_interval=50):
         self.report = 0
         self.hid = None
-        self._report_updated = False
+        self.poll_interval = poll_interval
+        # Main loop cycles `report_updated` stays set for: the one of the poll
+        # and the next.
+        self._report_updated = 0
+        self._subscribers = []
+        self._task = None
 
     def __repr__(self):
         return f'LockStatus(report={self.report})'
@@ -26,32 +50,46 @@ class LockStatus(Extension):
         if self.hid is None:
             raise RuntimeError
 
-    def before_matrix_scan(self, sandbox):
-        return
+        self._task = create_task(self._poll, period_ms=self.poll_interval)
 
-    def after_matrix_scan(self, sandbox):
-        return
+    def deinit(self, sandbox):
+        if self._task is not None:
+            cancel_task(self._task)
+            self._task = None
 
-    def before_hid_send(self, sandbox):
-        return
+    def subscribe(self, callback):
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
 
     def after_hid_send(self, sandbox):
+        if self._report_updated:
+            self._report_updated -= 1
+
+    def _poll(self):
         report = self.hid.get_last_received_report()
-        if report is None:
-            self._report_updated = False
-        else:
-            self.report = report[0]
-            self._report_updated = True
+        if report is None or report[0] == self.report:
+            return
 
-    def on_powersave_enable(self, sandbox):
-        return
+        changed = self.report ^ report[0]
+        self.report = report[0]
+        self._report_updated = 2
+        if debug.enabled:
+            debug('report=', self.report)
 
-    def on_powersave_disable(self, sandbox):
-        return
+        for callback in self._subscribers:
+            try:
+                callback(self, changed)
+            except Exception as err:
+                debug_error(self, 'subscriber', err)
 
     @property
     def report_updated(self):
-        return self._report_updated
+        '''Whether the report changed, for one main loop cycle.'''
+        return self._report_updated > 0
 
     def get_num_lock(self):
         return bool(self.report & _NUMLOCK)
@@ -189,21 +189,6 @@ class RGB(Extension):
 
         self._task = create_task(self.animate, period_ms=(1000 // self.refresh_rate))
 
-    def before_matrix_scan(self, sandbox):
-        return
-
-    def after_matrix_scan(self, sandbox):
-        return
-
-    def before_hid_send(self, sandbox):
-        return
-
-    def after_hid_send(self, sandbox):
-        pass
-
-    def on_powersave_enable(self, sandbox):
-        return
-
     def on_powersave_disable(self, sandbox):
         self._do_update()
 
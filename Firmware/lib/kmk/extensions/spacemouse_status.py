@@ -23,15 +23,6 @@ class SpacemouseStatus(Extension):
         if self.hid is None:
             raise RuntimeError
 
-    def before_matrix_scan(self, sandbox):
-        return
-
-    def after_matrix_scan(self, sandbox):
-        return
-
-    def before_hid_send(self, sandbox):
-        return
-
     def after_hid_send(self, sandbox):
         report = self.hid.get_last_received_report(4)
         if report is None:
@@ -40,12 +31,6 @@ class SpacemouseStatus(Extension):
             self.report = report[0]
             self._report_updated = True
 
-    def on_powersave_enable(self, sandbox):
-        return
-
-    def on_powersave_disable(self, sandbox):
-        return
-
     @property
     def report_updated(self):
         return self._report_updated
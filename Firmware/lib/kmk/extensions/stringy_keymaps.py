@@ -24,21 +24,3 @@ class StringyKeymaps(Extension):
                     elif debug.enabled:
                         debug('Replacing ', key, ' with ', replacement)
                     layer[key_idx] = replacement
-
-    def before_matrix_scan(self, keyboard):
-        return
-
-    def after_matrix_scan(self, keyboard):
-        return
-
-    def before_hid_send(self, keyboard):
-        return
-
-    def after_hid_send(self, keyboard):
-        return
-
-    def on_powersave_enable(self, keyboard):
-        return
-
-    def on_powersave_disable(self, keyboard):
-        return
@@ -27,7 +27,7 @@ def bootloader(*args, **kwargs):
 def gesc_pressed(key, keyboard, KC, *args, **kwargs):
     GESC_TRIGGERS = {KC.LSHIFT, KC.RSHIFT, KC.LGUI, KC.RGUI}
 
-    if GESC_TRIGGERS.intersection(keyboard.keys_pressed):
+    if keyboard.keys_pressed.intersection(GESC_TRIGGERS):
         # First, release GUI if already pressed
         keyboard._send_hid()
         # if Shift is held, KC_GRAVE will become KC_TILDE on OS level
@@ -52,7 +52,7 @@ def gesc_released(key, keyboard, KC, *args, **kwargs):
 def bkdl_pressed(key, keyboard, KC, *args, **kwargs):
     BKDL_TRIGGERS = {KC.LGUI, KC.RGUI}
 
-    if BKDL_TRIGGERS.intersection(keyboard.keys_pressed):
+    if keyboard.keys_pressed.intersection(BKDL_TRIGGERS):
         keyboard._send_hid()
         keyboard.keys_pressed.add(KC.DEL)
         keyboard.hid_pending = True
@@ -116,6 +116,18 @@ def ble_disconnect(key, keyboard, *args, **kwargs):
 def any_pressed(key, keyboard, *args, **kwargs):
     from random import randint
 
-    key.code = randint(4, 56)
-    keyboard.keys_pressed.add(key)
+    from kmk.keys import KeyboardKey
+
+    any_released(key, keyboard)
+    # Remember the key that was sent, to release it again.
+    sent = key.meta = KeyboardKey(randint(4, 56))
+    keyboard.keys_pressed.add(sent)
     keyboard.hid_pending = True
+
+
+def any_released(key, keyboard, *args, **kwargs):
+    sent = getattr(key, 'meta', None)
+    if sent is not None:
+        key.meta = None
+        keyboard.keys_pressed.discard(sent)
+        keyboard.hid_pending = True
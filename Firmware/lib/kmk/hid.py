@@ -2,8 +2,6 @@ import supervisor
 import usb_hid
 from micropython import const
 
-from struct import pack, pack_into
-
 from kmk.keys import (
     Axis,
     ConsumerKey,
@@ -13,8 +11,10 @@ from kmk.keys import (
     SixAxis,
     SpacemouseKey,
 )
+from kmk.kmktime import ticks_diff
+from kmk.ringbuffer import RingBuffer
 from kmk.scheduler import cancel_task, create_task
-from kmk.utils import Debug, clamp
+from kmk.utils import Debug, clamp, debug_error
 
 try:
     from adafruit_ble import BLERadio
@@ -54,10 +54,109 @@ _REPORT_SIZE_KEYBOARD = const(8)
 _REPORT_SIZE_KEYBOARD_NKRO = const(16)
 _REPORT_SIZE_MOUSE = const(4)
 _REPORT_SIZE_MOUSE_HSCROLL = const(5)
+_REPORT_SIZE_MOUSE_HIRES = const(9)
 _REPORT_SIZE_SIXAXIS = const(12)
 _REPORT_SIZE_SIXAXIS_BUTTON = const(2)
 _REPORT_SIZE_SYSCONTROL = const(8)
 
+_REPORT_ID_POINTER = const(2)
+_AXIS_WHEEL = const(2)
+_AXIS_PAN = const(3)
+_HIRES_LIMIT = const(0x7FFF)
+_SIXAXIS_LIMIT = const(500)
+_RESOLUTION_MULTIPLIER = const(120)
+
+# `KeyboardReport.keys`: the slot a keycode occupies in the low bits, the
+# number of further keys holding it above.
+_SLOT_MASK = const(0x07)
+_SLOT_HELD = const(0x08)
+# `KeyboardReport.free`: bit n is set while slot n + 2 is free.
+_SLOTS_FREE = const(0x3F)
+
+
+def _first_free_slots() -> bytes:
+    '''The first free slot of every `KeyboardReport.free` mask, 0 if none.'''
+    table = bytearray(_SLOTS_FREE + 1)
+    for mask in range(1, len(table)):
+        bit = 0
+        while not mask & (1 << bit):
+            bit += 1
+        table[mask] = bit + 2
+    return bytes(table)
+
+
+_FIRST_FREE_SLOT = _first_free_slots()
+
+
+def _add_bits(counts: bytearray, bits: int) -> None:
+    '''Count one more key holding each of `bits`.'''
+    bit = 0
+    while bits:
+        if bits & 1:
+            counts[bit] += 1
+        bits >>= 1
+        bit += 1
+
+
+def _remove_bits(counts: bytearray, bits: int) -> int:
+    '''Count one key less holding each of `bits`, and return the bits released.'''
+    released = 0
+    bit = 0
+    while bits:
+        if bits & 1 and counts[bit]:
+            counts[bit] -= 1
+            if not counts[bit]:
+                released |= 1 << bit
+        bits >>= 1
+        bit += 1
+    return released
+
+
+def _steady_bits(before, state, after, start, end):
+    '''
+    Whether no bit of `state[start:end]` differs from both `before` and `after`,
+    i.e. is pressed and released (or released and pressed) around `state`.
+    '''
+    for idx in range(start, end):
+        if (before[idx] ^ state[idx]) & (state[idx] ^ after[idx]):
+            return False
+    return True
+
+
+def _steady_bytes(before, state, after, start, end):
+    '''Like `_steady_bits`, for bytes that hold codes instead of bits.'''
+    for idx in range(start, end):
+        value = state[idx]
+        if value != before[idx] and value != after[idx]:
+            return False
+    return True
+
+
+def _motion(buffer, idx, width):
+    value = buffer[idx]
+    if width == 2:
+        value |= buffer[idx + 1] << 8
+    sign = 1 << (8 * width - 1)
+    return (value ^ sign) - sign
+
+
+def _fold_motion(state, after, start, width, limit):
+    '''
+    Add the relative motion of `state` to `after`, if every axis still fits
+    within `limit`. Axes are `width` bytes each, little endian, from `start`.
+    Returns whether it did.
+    '''
+    end = len(state)
+    for idx in range(start, end, width):
+        if abs(_motion(state, idx, width) + _motion(after, idx, width)) > limit:
+            return False
+    for idx in range(start, end, width):
+        value = _motion(state, idx, width) + _motion(after, idx, width)
+        after[idx] = 0xFF & value
+        if width == 2:
+            after[idx + 1] = 0xFF & (value >> 8)
+    return True
+
 
 def find_device(devices, usage_page, usage):
     for device in devices:
@@ -69,105 +168,313 @@ def find_device(devices, usage_page, usage):
             return device
 
 
-class Report:
-    def __init__(self, size):
-        self.buffer = bytearray(size)
-        self.pending = False
+def _take_motion(axis, limit, scale=1):
+    '''
+    Take up to `limit` units of 1/`scale` of `axis`' motion for a report and
+    return them. A rest too small for a whole unit is carried over in
+    `axis.fraction`.
+    '''
+    delta = axis.delta + axis.fraction
+    units = clamp(int(delta * scale), -limit, limit)
+    if scale == 1:
+        rest = delta - units
+    elif units % scale:
+        rest = delta - units / scale
+    else:
+        rest = delta - units // scale
+    if int(rest * scale):
+        axis.delta = rest
+        axis.fraction = 0
+    else:
+        axis.delta = 0
+        axis.fraction = rest
+    return units
 
-    def clear(self):
-        for k, v in enumerate(self.buffer):
-            if v:
-                self.buffer[k] = 0x00
-                self.pending = True
 
-    def get_action_map(self):
-        return {}
+class Report:
+    '''
+    A HID report, updated incrementally: the actions of `get_action_map` add
+    a key to the report, the ones of `get_release_map` remove it again, and
+    return `True` if that can't be done without rebuilding the report.
 
+    Changes set `pending`, which only stays set if the report differs from the
+    last one that was sent, or if it carries relative motion.
+    '''
 
-class KeyboardReport(Report):
-    def __init__(self, size=_REPORT_SIZE_KEYBOARD):
+    def __init__(self, size):
         self.buffer = bytearray(size)
+        # The last report that was sent.
         self.prev_buffer = bytearray(size)
+        self.pending = False
 
     @property
     def pending(self):
-        return self.buffer != self.prev_buffer
+        # Changes can cancel out before the next send: only compare with the
+        # last report when anything changed at all.
+        if self._dirty and self.buffer == self.prev_buffer and not self.has_motion():
+            self._dirty = False
+        return self._dirty
 
     @pending.setter
     def pending(self, v):
+        self._dirty = v
         if v is False:
-            self.prev_buffer[:] = self.buffer[:]
+            self.prev_buffer[:] = self.buffer
+
+    def has_motion(self):
+        '''
+        Whether the report moves something, i.e. has to be sent again even if
+        it's the same as the last one.
+        '''
+        return False
 
     def clear(self):
-        for idx in range(len(self.buffer)):
-            self.buffer[idx] = 0x00
+        buffer = self.buffer
+        for idx in range(len(buffer)):
+            if buffer[idx]:
+                buffer[idx] = 0x00
+                self.pending = True
+
+    def update(self):
+        '''Called before every send, i.e. to apply relative movements.'''
+        pass
+
+    def collapse(self, before, state, after):
+        '''
+        Whether the queued report `state` can be left out between `before` and
+        `after` without losing a transition, i.e. a tap. Reports with relative
+        motion add the motion of `state` to `after`.
+        '''
+        return _steady_bytes(before, state, after, 0, len(state))
+
+    def get_action_map(self):
+        return {}
+
+    def get_release_map(self):
+        return {}
+
+
+class KeyboardReport(Report):
+    def __init__(self, size=_REPORT_SIZE_KEYBOARD, keycodes=256):
+        super().__init__(size)
+        # Number of keys holding each modifier bit.
+        self.modifiers = bytearray(8)
+        # Per keycode: the slot and number of keys holding it, see `_SLOT_MASK`.
+        self.keys = bytearray(keycodes)
+        self.free = _SLOTS_FREE
+        # Number of keys that didn't fit into the report.
+        self.dropped = 0
+
+    def clear(self):
+        buffer = self.buffer
+        keys = self.keys
+        for idx in range(2, len(buffer)):
+            if buffer[idx]:
+                keys[buffer[idx]] = 0
+                buffer[idx] = 0x00
+                self.pending = True
+        self.free = _SLOTS_FREE
+        self._clear_modifiers()
+        self.dropped = 0
+
+    def _clear_modifiers(self):
+        if self.buffer[0]:
+            self.buffer[0] = 0x00
+            self.pending = True
+        modifiers = self.modifiers
+        for idx in range(len(modifiers)):
+            modifiers[idx] = 0
 
     def add_key(self, key):
-        # Find the first empty slot in the key report, and fill it; drop key if
-        # report is full.
-        idx = self.buffer.find(b'\x00', 2)
+        code = key.code
+        held = self.keys[code]
+        if held:
+            self.keys[code] = held + _SLOT_HELD
+            return
 
-        if 0 < idx < _REPORT_SIZE_KEYBOARD:
-            self.buffer[idx] = key.code
+        # Fill the first empty slot in the key report; drop the key if the
+        # report is full.
+        idx = _FIRST_FREE_SLOT[self.free]
+        if idx:
+            self.buffer[idx] = code
+            self.keys[code] = idx
+            self.free &= ~(1 << (idx - 2))
+            self.pending = True
+        else:
+            self.dropped += 1
 
     def remove_key(self, key):
-        idx = self.buffer.find(pack('B', key.code), 2)
-        if 0 < idx:
-            self.buffer[idx] = 0x00
+        code = key.code
+        held = self.keys[code]
+        if not held:
+            if self.dropped:
+                self.dropped -= 1
+            return
+        if held & ~_SLOT_MASK:
+            self.keys[code] = held - _SLOT_HELD
+            return
+
+        self.keys[code] = 0
+        self.buffer[held] = 0x00
+        self.free |= 1 << (held - 2)
+        self.pending = True
+        # A dropped key should take the free slot.
+        return self.dropped > 0
 
     def add_modifier(self, modifier):
-        self.buffer[0] |= modifier.code
+        _add_bits(self.modifiers, modifier.code)
+        if modifier.code & ~self.buffer[0]:
+            self.buffer[0] |= modifier.code
+            self.pending = True
 
     def remove_modifier(self, modifier):
-        self.buffer[0] &= ~modifier.code
+        released = _remove_bits(self.modifiers, modifier.code)
+        if released:
+            self.buffer[0] &= ~released
+            self.pending = True
+
+    def collapse(self, before, state, after):
+        # Modifier bits, a reserved byte, then keycodes.
+        return _steady_bits(before, state, after, 0, 1) and _steady_bytes(
+            before, state, after, 2, len(state)
+        )
 
     def get_action_map(self):
         return {KeyboardKey: self.add_key, ModifierKey: self.add_modifier}
 
+    def get_release_map(self):
+        return {KeyboardKey: self.remove_key, ModifierKey: self.remove_modifier}
+
 
 class NKROKeyboardReport(KeyboardReport):
     def __init__(self):
-        super().__init__(_REPORT_SIZE_KEYBOARD_NKRO)
+        # `keys` is the number of keys holding each keycode.
+        super().__init__(
+            _REPORT_SIZE_KEYBOARD_NKRO, (_REPORT_SIZE_KEYBOARD_NKRO - 1) * 8
+        )
+
+    def clear(self):
+        buffer = self.buffer
+        keys = self.keys
+        for idx in range(1, len(buffer)):
+            if buffer[idx]:
+                buffer[idx] = 0x00
+                self.pending = True
+        for idx in range(len(keys)):
+            keys[idx] = 0
+        self._clear_modifiers()
 
     def add_key(self, key):
-        self.buffer[(key.code >> 3) + 1] |= 1 << (key.code & 0x07)
+        code = key.code
+        held = self.keys[code]
+        self.keys[code] = held + 1
+        if not held:
+            self.buffer[(code >> 3) + 1] |= 1 << (code & 0x07)
+            self.pending = True
 
     def remove_key(self, key):
-        self.buffer[(key.code >> 3) + 1] &= ~(1 << (key.code & 0x07))
+        code = key.code
+        held = self.keys[code]
+        if not held:
+            return
+        self.keys[code] = held - 1
+        if held == 1:
+            self.buffer[(code >> 3) + 1] &= ~(1 << (code & 0x07))
+            self.pending = True
+
+    def collapse(self, before, state, after):
+        return _steady_bits(before, state, after, 0, len(state))
 
 
 class ConsumerControlReport(Report):
     def __init__(self):
         super().__init__(_REPORT_SIZE_CONSUMER)
+        self.held = 0
 
-    def add_cc(self, cc):
-        pack_into('<H', self.buffer, 0, cc.code)
-        self.pending = True
+    def clear(self):
+        super().clear()
+        self.held = 0
 
-    def remove_cc(self):
-        if self.buffer != b'\x00\x00':
-            self.buffer = b'\x00\x00'
+    def add_cc(self, cc):
+        self.held += 1
+        code = cc.code
+        buffer = self.buffer
+        if buffer[0] != code & 0xFF or buffer[1] != code >> 8:
+            buffer[0] = code & 0xFF
+            buffer[1] = code >> 8
             self.pending = True
 
+    def remove_cc(self, cc):
+        if self.held:
+            self.held -= 1
+        if self.held:
+            # Another consumer key is still held and should be reported.
+            return True
+        super().clear()
+
     def get_action_map(self):
         return {ConsumerKey: self.add_cc}
 
+    def get_release_map(self):
+        return {ConsumerKey: self.remove_cc}
+
 
 class PointingDeviceReport(Report):
     def __init__(self, size=_REPORT_SIZE_MOUSE):
         super().__init__(size)
+        # Number of keys holding each button bit.
+        self.buttons = bytearray(8)
+        self.axes = []
+
+    def clear(self):
+        super().clear()
+        for idx in range(len(self.buttons)):
+            self.buttons[idx] = 0
+        self.axes.clear()
+
+    def has_motion(self):
+        buffer = self.buffer
+        for idx in range(1, len(buffer)):
+            if buffer[idx]:
+                return True
+        return False
+
+    def update(self):
+        # Movements are relative: the previous one is reset, and the axes that
+        # are still moving applied again.
+        buffer = self.buffer
+        for idx in range(1, len(buffer)):
+            if buffer[idx]:
+                buffer[idx] = 0x00
+                self.pending = True
+        for axis in self.axes:
+            self.move_axis(axis)
 
     def add_button(self, key):
-        self.buffer[0] |= key.code
-        self.pending = True
+        _add_bits(self.buttons, key.code)
+        if key.code & ~self.buffer[0]:
+            self.buffer[0] |= key.code
+            self.pending = True
 
     def remove_button(self, key):
-        self.buffer[0] &= ~key.code
-        self.pending = True
+        released = _remove_bits(self.buttons, key.code)
+        if released:
+            self.buffer[0] &= ~released
+            self.pending = True
+
+    def add_axis(self, axis):
+        if axis not in self.axes:
+            self.axes.append(axis)
+
+    def remove_axis(self, axis):
+        if axis in self.axes:
+            self.axes.remove(axis)
 
     def move_axis(self, axis):
-        delta = clamp(axis.delta, -127, 127)
-        axis.delta -= delta
+        delta = _take_motion(axis, 127)
+        if not delta:
+            # `update` already reset the axis.
+            return
         try:
             self.buffer[axis.code + 1] = 0xFF & delta
             self.pending = True
@@ -175,8 +482,16 @@ class PointingDeviceReport(Report):
             if debug.enabled:
                 debug(axis, ' not supported')
 
+    def collapse(self, before, state, after):
+        return _steady_bits(before, state, after, 0, 1) and _fold_motion(
+            state, after, 1, 1, 127
+        )
+
     def get_action_map(self):
-        return {Axis: self.move_axis, MouseKey: self.add_button}
+        return {Axis: self.add_axis, MouseKey: self.add_button}
+
+    def get_release_map(self):
+        return {Axis: self.remove_axis, MouseKey: self.remove_button}
 
 
 class HSPointingDeviceReport(PointingDeviceReport):
@@ -184,13 +499,89 @@ class HSPointingDeviceReport(PointingDeviceReport):
         super().__init__(_REPORT_SIZE_MOUSE_HSCROLL)
 
 
+class HiResPointingDeviceReport(PointingDeviceReport):
+    '''
+    16 bit X, Y, wheel and pan, see `kmk.hid_reports.pointer.HIRES_POINTER`.
+    Wheel and pan are sent in 1/120 detents once the host enabled their
+    resolution multipliers.
+    '''
+
+    def __init__(self, device=None):
+        super().__init__(_REPORT_SIZE_MOUSE_HIRES)
+        self.device = device
+        # Wheel and pan units per detent.
+        self.multipliers = bytearray((1, 1))
+
+    def poll_multipliers(self):
+        # The host sets the multipliers with a feature report, usually right
+        # after enumeration.
+        if self.device is None:
+            return
+        feature = self.device.get_last_received_report(_REPORT_ID_POINTER)
+        if feature:
+            self.multipliers[0] = _RESOLUTION_MULTIPLIER if feature[0] & 0x03 else 1
+            self.multipliers[1] = _RESOLUTION_MULTIPLIER if feature[0] & 0x0C else 1
+            if debug.enabled:
+                debug('resolution multipliers ', tuple(self.multipliers))
+
+    def move_axis(self, axis):
+        code = axis.code
+        if code == _AXIS_WHEEL or code == _AXIS_PAN:
+            self.poll_multipliers()
+            scale = self.multipliers[code - _AXIS_WHEEL]
+        else:
+            scale = 1
+        delta = _take_motion(axis, _HIRES_LIMIT // scale * scale, scale)
+        if not delta:
+            return
+        index = 2 * code + 1
+        try:
+            self.buffer[index] = 0xFF & delta
+            self.buffer[index + 1] = 0xFF & (delta >> 8)
+            self.pending = True
+        except IndexError:
+            if debug.enabled:
+                debug(axis, ' not supported')
+
+    def collapse(self, before, state, after):
+        return _steady_bits(before, state, after, 0, 1) and _fold_motion(
+            state, after, 1, 2, _HIRES_LIMIT
+        )
+
+
 class SixAxisDeviceReport(Report):
     def __init__(self, size=_REPORT_SIZE_SIXAXIS):
         super().__init__(size)
+        self.axes = []
+
+    def clear(self):
+        super().clear()
+        self.axes.clear()
+
+    def has_motion(self):
+        buffer = self.buffer
+        for idx in range(len(buffer)):
+            if buffer[idx]:
+                return True
+        return False
+
+    def update(self):
+        super().clear()
+        for axis in self.axes:
+            self.move_six_axis(axis)
+
+    def add_axis(self, axis):
+        if axis not in self.axes:
+            self.axes.append(axis)
+
+    def remove_axis(self, axis):
+        if axis in self.axes:
+            self.axes.remove(axis)
 
     def move_six_axis(self, axis):
-        delta = clamp(axis.delta, -500, 500)
-        axis.delta -= delta
+        delta = _take_motion(axis, _SIXAXIS_LIMIT)
+        if not delta:
+            return
         index = 2 * axis.code
         try:
             self.buffer[index] = 0xFF & delta
@@ -200,25 +591,48 @@ class SixAxisDeviceReport(Report):
             if debug.enabled:
                 debug(axis, ' not supported')
 
+    def collapse(self, before, state, after):
+        return _fold_motion(state, after, 0, 2, _SIXAXIS_LIMIT)
+
     def get_action_map(self):
-        return {SixAxis: self.move_six_axis}
+        return {SixAxis: self.add_axis}
+
+    def get_release_map(self):
+        return {SixAxis: self.remove_axis}
 
 
 class SixAxisDeviceButtonReport(Report):
     def __init__(self, size=_REPORT_SIZE_SIXAXIS_BUTTON):
         super().__init__(size)
+        # Number of keys holding each button bit.
+        self.buttons = bytearray(8)
+
+    def clear(self):
+        super().clear()
+        for idx in range(len(self.buttons)):
+            self.buttons[idx] = 0
 
     def add_six_axis_button(self, key):
-        self.buffer[0] |= key.code
-        self.pending = True
+        _add_bits(self.buttons, key.code)
+        if key.code & ~self.buffer[0]:
+            self.buffer[0] |= key.code
+            self.pending = True
 
     def remove_six_axis_button(self, key):
-        self.buffer[0] &= ~key.code
-        self.pending = True
+        released = _remove_bits(self.buttons, key.code)
+        if released:
+            self.buffer[0] &= ~released
+            self.pending = True
+
+    def collapse(self, before, state, after):
+        return _steady_bits(before, state, after, 0, len(state))
 
     def get_action_map(self):
         return {SpacemouseKey: self.add_six_axis_button}
 
+    def get_release_map(self):
+        return {SpacemouseKey: self.remove_six_axis_button}
+
 
 class IdentifiedDevice:
     def __init__(self, device, report_id):
@@ -229,28 +643,284 @@ class IdentifiedDevice:
         self.device.send_report(buffer, self.report_id)
 
 
+class KeysPressed:
+    '''
+    The keys that make up the HID reports, `keyboard.keys_pressed`. It's used
+    like a `set`, and hands every change to `hid` as a delta, so that sending
+    doesn't have to rebuild the reports from all the held keys.
+    '''
+
+    def __init__(self):
+        self._keys = set()
+        # Held axes: they're moved after every send until they come to rest.
+        self.axes = []
+        self.hid = None
+
+    def __repr__(self):
+        return repr(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __bool__(self):
+        return bool(self._keys)
+
+    def __eq__(self, other):
+        if isinstance(other, KeysPressed):
+            other = other._keys
+        return self._keys == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    # `hid` sees changes before they're applied here: it may have to flush the
+    # reports, or rebuild them from the keys, first.
+
+    def add(self, key):
+        if key in self._keys:
+            return
+        if self.hid is not None:
+            self.hid.add(key)
+        self._keys.add(key)
+        if isinstance(key, Axis):
+            self.axes.append(key)
+
+    def discard(self, key):
+        if key not in self._keys:
+            return
+        if self.hid is not None:
+            self.hid.remove(key)
+        self._keys.remove(key)
+        if isinstance(key, Axis):
+            self.axes.remove(key)
+
+    def remove(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+        self.discard(key)
+
+    def pop(self):
+        key = self._keys.pop()
+        self._keys.add(key)
+        self.discard(key)
+        return key
+
+    def clear(self):
+        self._keys.clear()
+        self.axes.clear()
+        if self.hid is not None:
+            self.hid.resync = True
+
+    def copy(self):
+        return self._keys.copy()
+
+    def difference(self, *others):
+        return self._keys.difference(*others)
+
+    def intersection(self, *others):
+        return self._keys.intersection(*others)
+
+
 class AbstractHID:
+    # Reports per device that wait to be sent while the device is busy. A full
+    # queue makes room by collapsing a queued report that doesn't carry a
+    # transition of its own into the next one. If every one does, the report
+    # isn't queued but keeps collecting changes, and relative motion stays in
+    # the axes, until the device catches up.
+    report_queue_size = 16
+    # Busy devices are retried after the report interval, or `retry_ms`,
+    # doubling up to `retry_limit_ms` while they stay busy.
+    retry_ms = 4
+    retry_limit_ms = 1024
+
     def __init__(self):
         self.report_map = {}
+        self.release_map = {}
         self.device_map = {}
+        # Rebuild the reports from all held keys before the next send.
+        self.resync = True
+
+        # Report rate governor: with a `report_interval` in ms, changes within
+        # the interval are merged into one report. `deferred` tells that
+        # reports are held back and have to be sent on a later cycle.
+        self.report_interval = 0
+        self.deferred = False
+        # Sends the pending reports right away, set by the keyboard.
+        self.flush = None
+        self._last_send = None
+        # Keys that changed since the last send.
+        self._changed = set()
+
+        # Outbound report queues, per report. Reports that failed to send are
+        # counted in `dropped`, attempts to send to a busy device in `retried`,
+        # reports merged into the next one in `collapsed` and sends held back
+        # by a full queue in `stalled`.
+        self._queues = {}
+        self.dropped = 0
+        self.retried = 0
+        self.collapsed = 0
+        self.stalled = 0
+        # Set while reports wait for a busy device. They're sent by the retry
+        # task, not by the main loop.
+        self.queued = False
+        self._retry_delay = 0
+        self._retry_scheduled = False
+        self._retry_task = create_task(self._retry, after_ms=-1)
+
         self._setup_task = create_task(self.setup, period_ms=100)
 
     def __repr__(self):
         return self.__class__.__name__
 
     def create_report(self, keys):
+        '''Rebuild all reports from `keys`.'''
         for report in self.device_map.keys():
             report.clear()
 
         for key in keys:
             if action := self.report_map.get(type(key)):
                 action(key)
-
-    def send(self):
-        for report in self.device_map.keys():
-            if report.pending:
-                self.device_map[report].send_report(report.buffer)
-                report.pending = False
+        self.resync = False
+
+    def add(self, key):
+        '''Add a key that was just pressed to the reports.'''
+        if self.report_interval:
+            self._changing(key)
+        action = self.report_map.get(type(key))
+        if action is not None:
+            action(key)
+
+    def remove(self, key):
+        '''Remove a key that was just released from the reports.'''
+        if self.report_interval:
+            self._changing(key)
+        action = self.release_map.get(type(key))
+        if action is not None and action(key):
+            self.resync = True
+
+    def _changing(self, key):
+        # Never merge a press with its own release, or a release with the next
+        # press, or taps would get lost: send the first change now.
+        if key in self._changed and self.flush is not None:
+            self.flush()
+        self._changed.add(key)
+
+    def send(self, force=False):
+        '''
+        Send all pending reports, unless the report interval isn't over and
+        `force` isn't set. Returns whether any report was sent.
+        '''
+        now = supervisor.ticks_ms()
+        if (
+            self.report_interval
+            and not force
+            and self._last_send is not None
+            and ticks_diff(now, self._last_send) < self.report_interval
+        ):
+            self.deferred = True
+            return False
+        self.deferred = False
+        self._changed.clear()
+
+        # Only the retry task sends to a busy device.
+        sending = not self._retry_scheduled
+        sent = False
+        stalled = False
+        self.queued = False
+        for report, device in self.device_map.items():
+            queue = self._queues.get(report)
+            if queue is None:
+                queue = self._queues[report] = RingBuffer(
+                    self.report_queue_size,
+                    lambda size=len(report.buffer): bytearray(size),
+                )
+
+            if len(queue) < queue.size or self._collapse(report, queue):
+                report.update()
+                if report.pending:
+                    queue.push()[:] = report.buffer
+                    report.pending = False
+            else:
+                self.stalled += 1
+                stalled = True
+
+            if sending and self._send_queued(queue, device):
+                sent = True
+            if queue:
+                self.queued = True
+
+        if sending:
+            if self.queued:
+                self._back_off()
+            else:
+                self._retry_delay = 0
+                # The queue drained after all, the stalled report goes next.
+                self.deferred = stalled
+        if sent:
+            self._last_send = now
+        return sent
+
+    def _collapse(self, report, queue):
+        '''
+        Make room in a full `queue`, by collapsing the newest report that can be
+        left out without losing a transition into the next one. The oldest
+        report is kept, the last sent one isn't known anymore.
+        '''
+        for idx in range(len(queue) - 2, 0, -1):
+            if report.collapse(queue[idx - 1], queue[idx], queue[idx + 1]):
+                queue.remove(idx)
+                self.collapsed += 1
+                return True
+        return False
+
+    def _send_queued(self, queue, device):
+        '''
+        Send queued reports in order until the device is busy. Returns whether
+        any report was sent.
+        '''
+        sent = False
+        while queue:
+            buffer = queue.pop()
+            try:
+                device.send_report(buffer)
+            except OSError as e:
+                # Busy or suspended: the retry task tries again.
+                queue.push_front()
+                self.retried += 1
+                if debug.enabled:
+                    debug('send_report: ', e)
+                break
+            except Exception as e:
+                # Not going to work any better later: drop it.
+                self.dropped += 1
+                debug_error(device, 'send_report', e)
+                continue
+            sent = True
+        return sent
+
+    def _back_off(self):
+        delay = self._retry_delay
+        if delay:
+            delay = min(2 * delay, self.retry_limit_ms)
+        else:
+            delay = max(self.report_interval, self.retry_ms)
+        self._retry_delay = delay
+        self._retry_scheduled = True
+        create_task(self._retry_task, after_ms=delay)
+
+    def _retry(self):
+        # Sends what's queued along with any changes, like the keyboard would.
+        self._retry_scheduled = False
+        if self.flush is not None:
+            self.flush()
+        else:
+            self.send(force=True)
 
     def setup(self):
         if not self.connected:
@@ -264,6 +934,8 @@ class AbstractHID:
 
             cancel_task(self._setup_task)
             self._setup_task = None
+            # The new reports don't know about keys that are already held.
+            self.resync = True
             if debug.enabled:
                 self.show_debug()
 
@@ -281,33 +953,42 @@ class AbstractHID:
                 report = NKROKeyboardReport()
 
             self.report_map.update(report.get_action_map())
+            self.release_map.update(report.get_release_map())
             self.device_map[report] = device
 
     def setup_consumer_control(self):
         if device := find_device(self.devices, _USAGE_PAGE_CONSUMER, _USAGE_CONSUMER):
             report = ConsumerControlReport()
             self.report_map.update(report.get_action_map())
+            self.release_map.update(report.get_release_map())
             self.device_map[report] = device
 
     def setup_mouse_hid(self):
         if device := find_device(self.devices, _USAGE_PAGE_MOUSE, _USAGE_MOUSE):
-            # bodgy pointing device panning autodetect
+            # bodgy pointing device panning and high resolution autodetect
             try:
                 report = PointingDeviceReport()
                 device.send_report(report.buffer)
             except ValueError:
-                report = HSPointingDeviceReport()
+                try:
+                    report = HSPointingDeviceReport()
+                    device.send_report(report.buffer)
+                except ValueError:
+                    report = HiResPointingDeviceReport(device)
 
             self.report_map.update(report.get_action_map())
+            self.release_map.update(report.get_release_map())
             self.device_map[report] = device
 
     def setup_sixaxis_hid(self):
         if device := find_device(self.devices, _USAGE_PAGE_SIXAXIS, _USAGE_SIXAXIS):
             report = SixAxisDeviceReport()
             self.report_map.update(report.get_action_map())
+            self.release_map.update(report.get_release_map())
             self.device_map[report] = IdentifiedDevice(device, 1)
             report = SixAxisDeviceButtonReport()
             self.report_map.update(report.get_action_map())
+            self.release_map.update(report.get_release_map())
             self.device_map[report] = IdentifiedDevice(device, 3)
 
     def show_debug(self):
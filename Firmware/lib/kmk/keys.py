@@ -3,6 +3,9 @@ try:
 except ImportError:
     pass
 
+from array import array
+from micropython import const
+
 import kmk.handlers.stock as handlers
 from kmk.utils import Debug
 
@@ -20,9 +23,14 @@ debug = Debug(__name__)
 
 
 class Axis:
+    __slots__ = ('code', 'delta', 'fraction')
+
     def __init__(self, code: int) -> None:
         self.code = code
+        # Motion not yet sent. May be fractional, the part that's too small
+        # for a report is carried over in `fraction`.
         self.delta = 0
+        self.fraction = 0
 
     def __repr__(self) -> str:
         return f'Axis(code={self.code}, delta={self.delta})'
@@ -37,6 +45,8 @@ class Axis:
 
 
 class SixAxis(Axis):
+    __slots__ = ()
+
     def __repr__(self) -> str:
         return f'SixAxis(code={self.code}, delta={self.delta})'
 
@@ -85,288 +95,231 @@ def maybe_make_argumented_key(
     return closure
 
 
-def maybe_make_no_key(candidate: str) -> Optional[Key]:
+# Static key table: `(names, kind, argument)` for every built-in key. Keys are
+# only created when they're first looked up; `_KEY_NAMES` and `_KEY_ROWS` index
+# the table by name, see `_find_key_row`.
+_KEYBOARD = const(0)
+_MODIFIER = const(1)
+_SHIFTED = const(2)
+_HANDLER = const(3)
+
+_KEY_TABLE = (
     # NO and TRNS are functionally identical in how they (don't) mutate
     # the state, but are tracked semantically separately, so create
     # two keys with the exact same functionality
-    keys = (
-        ('NO', 'XXXXXXX'),
+    (('NO', 'XXXXXXX'), _HANDLER, (handlers.passthrough, handlers.passthrough)),
+    (
         ('TRANSPARENT', 'TRNS'),
-    )
-
-    for names in keys:
-        if candidate in names:
-            return make_key(
-                names=names,
-                on_press=handlers.passthrough,
-                on_release=handlers.passthrough,
-            )
-
-
-def maybe_make_alpha_key(candidate: str) -> Optional[Key]:
-    if len(candidate) != 1:
-        return
-
-    candidate_upper = candidate.upper()
-    if candidate_upper in ALL_ALPHAS:
-        return make_key(
-            names=(candidate_upper, candidate.lower()),
-            constructor=KeyboardKey,
-            code=4 + ALL_ALPHAS.index(candidate_upper),
-        )
-
-
-def maybe_make_numeric_key(candidate: str) -> Optional[Key]:
-    if candidate in ALL_NUMBERS or candidate in ALL_NUMBER_ALIASES:
-        try:
-            offset = ALL_NUMBERS.index(candidate)
-        except ValueError:
-            offset = ALL_NUMBER_ALIASES.index(candidate)
-
-        return make_key(
-            names=(ALL_NUMBERS[offset], ALL_NUMBER_ALIASES[offset]),
-            constructor=KeyboardKey,
-            code=30 + offset,
-        )
-
-
-def maybe_make_mod_key(candidate: str) -> Optional[Key]:
+        _HANDLER,
+        (handlers.passthrough, handlers.passthrough),
+    ),
+    # Firmware keys
+    (('BLE_REFRESH',), _HANDLER, (handlers.ble_refresh, None)),
+    (('BLE_DISCONNECT',), _HANDLER, (handlers.ble_disconnect, None)),
+    (('BOOTLOADER',), _HANDLER, (handlers.bootloader, None)),
+    (('HID_SWITCH', 'HID'), _HANDLER, (handlers.hid_switch, None)),
+    (('RELOAD', 'RLD'), _HANDLER, (handlers.reload, None)),
+    (('RESET',), _HANDLER, (handlers.reset, None)),
+    (('ANY',), _HANDLER, (handlers.any_pressed, handlers.any_released)),
+    (('BKDL',), _HANDLER, (handlers.bkdl_pressed, handlers.bkdl_released)),
+    (('GESC', 'GRAVE_ESC'), _HANDLER, (handlers.gesc_pressed, handlers.gesc_released)),
+    # Modifiers
     # MEH = LCTL | LALT | LSFT
     # HYPR = LCTL | LALT | LSFT | LGUI
-    mods = (
-        (0x01, ('LEFT_CONTROL', 'LCTRL', 'LCTL')),
-        (0x02, ('LEFT_SHIFT', 'LSHIFT', 'LSFT')),
-        (0x04, ('LEFT_ALT', 'LALT', 'LOPT')),
-        (0x08, ('LEFT_SUPER', 'LGUI', 'LCMD', 'LWIN')),
-        (0x10, ('RIGHT_CONTROL', 'RCTRL', 'RCTL')),
-        (0x20, ('RIGHT_SHIFT', 'RSHIFT', 'RSFT')),
-        (0x40, ('RIGHT_ALT', 'RALT', 'ROPT')),
-        (0x80, ('RIGHT_SUPER', 'RGUI', 'RCMD', 'RWIN')),
-        (0x07, ('MEH',)),
-        (0x0F, ('HYPER', 'HYPR')),
-    )
-
-    for code, names in mods:
-        if candidate in names:
-            return make_key(names=names, constructor=ModifierKey, code=code)
-
-
-def maybe_make_more_ascii(candidate: str) -> Optional[Key]:
-    codes = (
-        (40, ('ENTER', 'ENT', '\n')),
-        (41, ('ESCAPE', 'ESC')),
-        (42, ('BACKSPACE', 'BSPACE', 'BSPC', 'BKSP')),
-        (43, ('TAB', '\t')),
-        (44, ('SPACE', 'SPC', ' ')),
-        (45, ('MINUS', 'MINS', '-')),
-        (46, ('EQUAL', 'EQL', '=')),
-        (47, ('LBRACKET', 'LBRC', '[')),
-        (48, ('RBRACKET', 'RBRC', ']')),
-        (49, ('BACKSLASH', 'BSLASH', 'BSLS', '\\')),
-        (51, ('SEMICOLON', 'SCOLON', 'SCLN', ';')),
-        (52, ('QUOTE', 'QUOT', "'")),
-        (53, ('GRAVE', 'GRV', 'ZKHK', '`')),
-        (54, ('COMMA', 'COMM', ',')),
-        (55, ('DOT', '.')),
-        (56, ('SLASH', 'SLSH', '/')),
-    )
-
-    for code, names in codes:
-        if candidate in names:
-            return make_key(names=names, constructor=KeyboardKey, code=code)
-
-
-def maybe_make_fn_key(candidate: str) -> Optional[Key]:
-    codes = (
-        (58, ('F1',)),
-        (59, ('F2',)),
-        (60, ('F3',)),
-        (61, ('F4',)),
-        (62, ('F5',)),
-        (63, ('F6',)),
-        (64, ('F7',)),
-        (65, ('F8',)),
-        (66, ('F9',)),
-        (67, ('F10',)),
-        (68, ('F11',)),
-        (69, ('F12',)),
-        (104, ('F13',)),
-        (105, ('F14',)),
-        (106, ('F15',)),
-        (107, ('F16',)),
-        (108, ('F17',)),
-        (109, ('F18',)),
-        (110, ('F19',)),
-        (111, ('F20',)),
-        (112, ('F21',)),
-        (113, ('F22',)),
-        (114, ('F23',)),
-        (115, ('F24',)),
-    )
-
-    for code, names in codes:
-        if candidate in names:
-            return make_key(names=names, constructor=KeyboardKey, code=code)
-
-
-def maybe_make_navlock_key(candidate: str) -> Optional[Key]:
-    codes = (
-        (57, ('CAPS_LOCK', 'CAPSLOCK', 'CLCK', 'CAPS')),
-        # FIXME: Investigate whether this key actually works, and
-        #        uncomment when/if it does.
-        # (130, ('LOCKING_CAPS', 'LCAP')),
-        (70, ('PRINT_SCREEN', 'PSCREEN', 'PSCR')),
-        (71, ('SCROLL_LOCK', 'SCROLLLOCK', 'SLCK')),
-        # FIXME: Investigate whether this key actually works, and
-        #        uncomment when/if it does.
-        # (132, ('LOCKING_SCROLL', 'LSCRL')),
-        (72, ('PAUSE', 'PAUS', 'BRK')),
-        (73, ('INSERT', 'INS')),
-        (74, ('HOME',)),
-        (75, ('PGUP',)),
-        (76, ('DELETE', 'DEL')),
-        (77, ('END',)),
-        (78, ('PGDOWN', 'PGDN')),
-        (79, ('RIGHT', 'RGHT')),
-        (80, ('LEFT',)),
-        (81, ('DOWN',)),
-        (82, ('UP',)),
-    )
-
-    for code, names in codes:
-        if candidate in names:
-            return make_key(names=names, constructor=KeyboardKey, code=code)
-
-
-def maybe_make_numpad_key(candidate: str) -> Optional[Key]:
-    codes = (
-        (83, ('NUM_LOCK', 'NUMLOCK', 'NLCK')),
-        (84, ('KP_SLASH', 'NUMPAD_SLASH', 'PSLS')),
-        (85, ('KP_ASTERISK', 'NUMPAD_ASTERISK', 'PAST')),
-        (86, ('KP_MINUS', 'NUMPAD_MINUS', 'PMNS')),
-        (87, ('KP_PLUS', 'NUMPAD_PLUS', 'PPLS')),
-        (88, ('KP_ENTER', 'NUMPAD_ENTER', 'PENT')),
-        (89, ('KP_1', 'P1', 'NUMPAD_1')),
-        (90, ('KP_2', 'P2', 'NUMPAD_2')),
-        (91, ('KP_3', 'P3', 'NUMPAD_3')),
-        (92, ('KP_4', 'P4', 'NUMPAD_4')),
-        (93, ('KP_5', 'P5', 'NUMPAD_5')),
-        (94, ('KP_6', 'P6', 'NUMPAD_6')),
-        (95, ('KP_7', 'P7', 'NUMPAD_7')),
-        (96, ('KP_8', 'P8', 'NUMPAD_8')),
-        (97, ('KP_9', 'P9', 'NUMPAD_9')),
-        (98, ('KP_0', 'P0', 'NUMPAD_0')),
-        (99, ('KP_DOT', 'PDOT', 'NUMPAD_DOT')),
-        (103, ('KP_EQUAL', 'PEQL', 'NUMPAD_EQUAL')),
-        (133, ('KP_COMMA', 'PCMM', 'NUMPAD_COMMA')),
-        (134, ('KP_EQUAL_AS400', 'NUMPAD_EQUAL_AS400')),
-    )
-
-    for code, names in codes:
-        if candidate in names:
-            return make_key(names=names, constructor=KeyboardKey, code=code)
-
-
-def maybe_make_shifted_key(candidate: str) -> Optional[Key]:
-    codes = (
-        ('1', ('EXCLAIM', 'EXLM', '!')),
-        ('2', ('AT', '@')),
-        ('3', ('HASH', 'POUND', '#')),
-        ('4', ('DOLLAR', 'DLR', '$')),
-        ('5', ('PERCENT', 'PERC', '%')),
-        ('6', ('CIRCUMFLEX', 'CIRC', '^')),
-        ('7', ('AMPERSAND', 'AMPR', '&')),
-        ('8', ('ASTERISK', 'ASTR', '*')),
-        ('9', ('LEFT_PAREN', 'LPRN', '(')),
-        ('0', ('RIGHT_PAREN', 'RPRN', ')')),
-        ('-', ('UNDERSCORE', 'UNDS', '_')),
-        ('=', ('PLUS', '+')),
-        ('[', ('LEFT_CURLY_BRACE', 'LCBR', '{')),
-        (']', ('RIGHT_CURLY_BRACE', 'RCBR', '}')),
-        ('\\', ('PIPE', '|')),
-        (';', ('COLON', 'COLN', ':')),
-        ("'", ('DOUBLE_QUOTE', 'DQUO', 'DQT', '"')),
-        ('`', ('TILDE', 'TILD', '~')),
-        (',', ('LEFT_ANGLE_BRACKET', 'LABK', '<')),
-        ('.', ('RIGHT_ANGLE_BRACKET', 'RABK', '>')),
-        ('/', ('QUESTION', 'QUES', '?')),
-    )
-
-    for unshifted, names in codes:
-        if candidate in names:
-            return make_key(
-                names=names,
-                constructor=ModifiedKey,
-                code=KC[unshifted],
-                modifier=KC.LSFT,
-            )
-
-
-def maybe_make_bkdl_key(candidate: str) -> Optional[Key]:
-    names = ('BKDL',)
-
-    if candidate in names:
-        return make_key(
-            names=names,
-            on_press=handlers.bkdl_pressed,
-            on_release=handlers.bkdl_released,
-        )
-
-
-def maybe_make_gesc_key(candidate: str) -> Optional[Key]:
-    names = ('GESC', 'GRAVE_ESC')
-
-    if candidate in names:
-        return make_key(
-            names=names,
-            on_press=handlers.gesc_pressed,
-            on_release=handlers.gesc_released,
-        )
-
-
-def maybe_make_firmware_key(candidate: str) -> Optional[Key]:
-    keys = (
-        ((('BLE_REFRESH',), handlers.ble_refresh)),
-        ((('BLE_DISCONNECT',), handlers.ble_disconnect)),
-        ((('BOOTLOADER',), handlers.bootloader)),
-        ((('HID_SWITCH', 'HID'), handlers.hid_switch)),
-        ((('RELOAD', 'RLD'), handlers.reload)),
-        ((('RESET',), handlers.reset)),
-        ((('ANY',), handlers.any_pressed)),
-    )
-
-    for names, handler in keys:
-        if candidate in names:
-            return make_key(names=names, on_press=handler)
-
-
-KEY_GENERATORS = (
-    maybe_make_no_key,
-    maybe_make_alpha_key,
-    maybe_make_numeric_key,
-    maybe_make_firmware_key,
-    maybe_make_bkdl_key,
-    maybe_make_gesc_key,
-    maybe_make_mod_key,
+    (('LEFT_CONTROL', 'LCTRL', 'LCTL'), _MODIFIER, 0x01),
+    (('LEFT_SHIFT', 'LSHIFT', 'LSFT'), _MODIFIER, 0x02),
+    (('LEFT_ALT', 'LALT', 'LOPT'), _MODIFIER, 0x04),
+    (('LEFT_SUPER', 'LGUI', 'LCMD', 'LWIN'), _MODIFIER, 0x08),
+    (('RIGHT_CONTROL', 'RCTRL', 'RCTL'), _MODIFIER, 0x10),
+    (('RIGHT_SHIFT', 'RSHIFT', 'RSFT'), _MODIFIER, 0x20),
+    (('RIGHT_ALT', 'RALT', 'ROPT'), _MODIFIER, 0x40),
+    (('RIGHT_SUPER', 'RGUI', 'RCMD', 'RWIN'), _MODIFIER, 0x80),
+    (('MEH',), _MODIFIER, 0x07),
+    (('HYPER', 'HYPR'), _MODIFIER, 0x0F),
     # More ASCII standard keys
-    maybe_make_more_ascii,
+    (('ENTER', 'ENT', '\n'), _KEYBOARD, 40),
+    (('ESCAPE', 'ESC'), _KEYBOARD, 41),
+    (('BACKSPACE', 'BSPACE', 'BSPC', 'BKSP'), _KEYBOARD, 42),
+    (('TAB', '\t'), _KEYBOARD, 43),
+    (('SPACE', 'SPC', ' '), _KEYBOARD, 44),
+    (('MINUS', 'MINS', '-'), _KEYBOARD, 45),
+    (('EQUAL', 'EQL', '='), _KEYBOARD, 46),
+    (('LBRACKET', 'LBRC', '['), _KEYBOARD, 47),
+    (('RBRACKET', 'RBRC', ']'), _KEYBOARD, 48),
+    (('BACKSLASH', 'BSLASH', 'BSLS', '\\'), _KEYBOARD, 49),
+    (('SEMICOLON', 'SCOLON', 'SCLN', ';'), _KEYBOARD, 51),
+    (('QUOTE', 'QUOT', "'"), _KEYBOARD, 52),
+    (('GRAVE', 'GRV', 'ZKHK', '`'), _KEYBOARD, 53),
+    (('COMMA', 'COMM', ','), _KEYBOARD, 54),
+    (('DOT', '.'), _KEYBOARD, 55),
+    (('SLASH', 'SLSH', '/'), _KEYBOARD, 56),
     # Function Keys
-    maybe_make_fn_key,
+    (('F1',), _KEYBOARD, 58),
+    (('F2',), _KEYBOARD, 59),
+    (('F3',), _KEYBOARD, 60),
+    (('F4',), _KEYBOARD, 61),
+    (('F5',), _KEYBOARD, 62),
+    (('F6',), _KEYBOARD, 63),
+    (('F7',), _KEYBOARD, 64),
+    (('F8',), _KEYBOARD, 65),
+    (('F9',), _KEYBOARD, 66),
+    (('F10',), _KEYBOARD, 67),
+    (('F11',), _KEYBOARD, 68),
+    (('F12',), _KEYBOARD, 69),
+    (('F13',), _KEYBOARD, 104),
+    (('F14',), _KEYBOARD, 105),
+    (('F15',), _KEYBOARD, 106),
+    (('F16',), _KEYBOARD, 107),
+    (('F17',), _KEYBOARD, 108),
+    (('F18',), _KEYBOARD, 109),
+    (('F19',), _KEYBOARD, 110),
+    (('F20',), _KEYBOARD, 111),
+    (('F21',), _KEYBOARD, 112),
+    (('F22',), _KEYBOARD, 113),
+    (('F23',), _KEYBOARD, 114),
+    (('F24',), _KEYBOARD, 115),
     # Lock Keys, Navigation, etc.
-    maybe_make_navlock_key,
+    (('CAPS_LOCK', 'CAPSLOCK', 'CLCK', 'CAPS'), _KEYBOARD, 57),
+    # FIXME: Investigate whether this key actually works, and
+    #        uncomment when/if it does.
+    # (('LOCKING_CAPS', 'LCAP'), _KEYBOARD, 130),
+    (('PRINT_SCREEN', 'PSCREEN', 'PSCR'), _KEYBOARD, 70),
+    (('SCROLL_LOCK', 'SCROLLLOCK', 'SLCK'), _KEYBOARD, 71),
+    # FIXME: Investigate whether this key actually works, and
+    #        uncomment when/if it does.
+    # (('LOCKING_SCROLL', 'LSCRL'), _KEYBOARD, 132),
+    (('PAUSE', 'PAUS', 'BRK'), _KEYBOARD, 72),
+    (('INSERT', 'INS'), _KEYBOARD, 73),
+    (('HOME',), _KEYBOARD, 74),
+    (('PGUP',), _KEYBOARD, 75),
+    (('DELETE', 'DEL'), _KEYBOARD, 76),
+    (('END',), _KEYBOARD, 77),
+    (('PGDOWN', 'PGDN'), _KEYBOARD, 78),
+    (('RIGHT', 'RGHT'), _KEYBOARD, 79),
+    (('LEFT',), _KEYBOARD, 80),
+    (('DOWN',), _KEYBOARD, 81),
+    (('UP',), _KEYBOARD, 82),
     # Numpad
     # FIXME: Investigate whether this key actually works, and
     #        uncomment when/if it does.
-    # maybe_make_key(131, ('LOCKING_NUM', 'LNUM')),
-    maybe_make_numpad_key,
+    # (('LOCKING_NUM', 'LNUM'), _KEYBOARD, 131),
+    (('NUM_LOCK', 'NUMLOCK', 'NLCK'), _KEYBOARD, 83),
+    (('KP_SLASH', 'NUMPAD_SLASH', 'PSLS'), _KEYBOARD, 84),
+    (('KP_ASTERISK', 'NUMPAD_ASTERISK', 'PAST'), _KEYBOARD, 85),
+    (('KP_MINUS', 'NUMPAD_MINUS', 'PMNS'), _KEYBOARD, 86),
+    (('KP_PLUS', 'NUMPAD_PLUS', 'PPLS'), _KEYBOARD, 87),
+    (('KP_ENTER', 'NUMPAD_ENTER', 'PENT'), _KEYBOARD, 88),
+    (('KP_1', 'P1', 'NUMPAD_1'), _KEYBOARD, 89),
+    (('KP_2', 'P2', 'NUMPAD_2'), _KEYBOARD, 90),
+    (('KP_3', 'P3', 'NUMPAD_3'), _KEYBOARD, 91),
+    (('KP_4', 'P4', 'NUMPAD_4'), _KEYBOARD, 92),
+    (('KP_5', 'P5', 'NUMPAD_5'), _KEYBOARD, 93),
+    (('KP_6', 'P6', 'NUMPAD_6'), _KEYBOARD, 94),
+    (('KP_7', 'P7', 'NUMPAD_7'), _KEYBOARD, 95),
+    (('KP_8', 'P8', 'NUMPAD_8'), _KEYBOARD, 96),
+    (('KP_9', 'P9', 'NUMPAD_9'), _KEYBOARD, 97),
+    (('KP_0', 'P0', 'NUMPAD_0'), _KEYBOARD, 98),
+    (('KP_DOT', 'PDOT', 'NUMPAD_DOT'), _KEYBOARD, 99),
+    (('KP_EQUAL', 'PEQL', 'NUMPAD_EQUAL'), _KEYBOARD, 103),
+    (('KP_COMMA', 'PCMM', 'NUMPAD_COMMA'), _KEYBOARD, 133),
+    (('KP_EQUAL_AS400', 'NUMPAD_EQUAL_AS400'), _KEYBOARD, 134),
     # Making life better for folks on tiny keyboards especially: exposes
     # the 'shifted' keys as raw keys. Under the hood we're still
     # sending Shift+(whatever key is normally pressed) to get these, so
     # for example `KC_AT` will hold shift and press 2.
-    maybe_make_shifted_key,
+    (('EXCLAIM', 'EXLM', '!'), _SHIFTED, '1'),
+    (('AT', '@'), _SHIFTED, '2'),
+    (('HASH', 'POUND', '#'), _SHIFTED, '3'),
+    (('DOLLAR', 'DLR', '$'), _SHIFTED, '4'),
+    (('PERCENT', 'PERC', '%'), _SHIFTED, '5'),
+    (('CIRCUMFLEX', 'CIRC', '^'), _SHIFTED, '6'),
+    (('AMPERSAND', 'AMPR', '&'), _SHIFTED, '7'),
+    (('ASTERISK', 'ASTR', '*'), _SHIFTED, '8'),
+    (('LEFT_PAREN', 'LPRN', '('), _SHIFTED, '9'),
+    (('RIGHT_PAREN', 'RPRN', ')'), _SHIFTED, '0'),
+    (('UNDERSCORE', 'UNDS', '_'), _SHIFTED, '-'),
+    (('PLUS', '+'), _SHIFTED, '='),
+    (('LEFT_CURLY_BRACE', 'LCBR', '{'), _SHIFTED, '['),
+    (('RIGHT_CURLY_BRACE', 'RCBR', '}'), _SHIFTED, ']'),
+    (('PIPE', '|'), _SHIFTED, '\\'),
+    (('COLON', 'COLN', ':'), _SHIFTED, ';'),
+    (('DOUBLE_QUOTE', 'DQUO', 'DQT', '"'), _SHIFTED, "'"),
+    (('TILDE', 'TILD', '~'), _SHIFTED, '`'),
+    (('LEFT_ANGLE_BRACKET', 'LABK', '<'), _SHIFTED, ','),
+    (('RIGHT_ANGLE_BRACKET', 'RABK', '>'), _SHIFTED, '.'),
+    (('QUESTION', 'QUES', '?'), _SHIFTED, '/'),
+)
+# Alphas and numbers follow a pattern, no need to spell them out.
+_KEY_TABLE += tuple(
+    ((a, a.lower()), _KEYBOARD, 4 + i) for i, a in enumerate(ALL_ALPHAS)
+) + tuple(
+    ((n, ALL_NUMBER_ALIASES[i]), _KEYBOARD, 30 + i) for i, n in enumerate(ALL_NUMBERS)
 )
 
 
+def _build_key_index(table: tuple) -> Tuple[tuple, array]:
+    entries = sorted((name, row) for row, key in enumerate(table) for name in key[0])
+    names = tuple(entry[0] for entry in entries)
+    # Rows are stored as u16, enough for 65536 table rows.
+    rows = array('H', [entry[1] for entry in entries])
+    return names, rows
+
+
+# All names of `_KEY_TABLE` in sorted order, and the table row of each name.
+_KEY_NAMES, _KEY_ROWS = _build_key_index(_KEY_TABLE)
+
+
+def _find_key_row(name: str) -> Optional[int]:
+    '''Binary search for `name` in the static key table, returns its row.'''
+    names = _KEY_NAMES
+    lo = 0
+    hi = len(names)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if names[mid] < name:
+            lo = mid + 1
+        else:
+            hi = mid
+    if lo < len(names) and names[lo] == name:
+        return _KEY_ROWS[lo]
+
+
+# Keys created from the static key table, by row. Lets `KC.release()` drop
+# their names and still resolve them to the same objects later on.
+_static_keys = {}
+# Interned keys: modified keys by base key (or keycode) and modifier bits, and
+# argumented keys by their factory and arguments.
+_interned = {}
+
+
+def _make_static_key(row: int) -> Key:
+    names, kind, arg = _KEY_TABLE[row]
+    if kind == _KEYBOARD:
+        key = make_key(names=names, constructor=KeyboardKey, code=arg)
+    elif kind == _MODIFIER:
+        key = make_key(names=names, constructor=ModifierKey, code=arg)
+    elif kind == _SHIFTED:
+        key = make_key(
+            names=names,
+            constructor=_modified_key,
+            code=KC[arg],
+            modifier=KC.LSFT,
+        )
+    else:
+        on_press, on_release = arg
+        if on_release is None:
+            key = make_key(names=names, on_press=on_press)
+        else:
+            key = make_key(names=names, on_press=on_press, on_release=on_release)
+    _static_keys[row] = key
+    return key
+
+
+# Fallbacks for names that aren't in the static key table: functions taking a
+# name and returning a key or `None`, see `maybe_make_key`.
+KEY_GENERATORS = ()
+
+
 class KeyAttrDict:
     # Instead of relying on the uncontrollable availability of a big chunk of
     # contiguous memory for key caching, we can manually fragment the cache into
@@ -406,12 +359,44 @@ class KeyAttrDict:
     def clear(self):
         self.__cache.clear()
         self.__cache.append({})
+        _static_keys.clear()
+        _interned.clear()
+
+    def release(self) -> None:
+        '''
+        Drop the names of built-in keys from the cache, i.e. all the aliases
+        like `LEFT_CONTROL`, `LCTRL` and `LCTL`. They're looked up again in
+        the static key table on demand and resolve to the same key objects.
+        Custom keys and overridden names are kept.
+        '''
+        kept = [{}]
+        for partition in self.__cache:
+            for name, key in partition.items():
+                row = _find_key_row(name)
+                if row is not None and _static_keys.get(row) is key:
+                    continue
+                if len(kept[-1]) >= self.__partition_size:
+                    kept.append({})
+                kept[-1][name] = key
+        self.__cache.clear()
+        self.__cache.extend(kept)
 
     def __getitem__(self, name: str):
         for partition in self.__cache:
             if name in partition:
                 return partition[name]
 
+        row = _find_key_row(name)
+        if row is not None:
+            try:
+                key = _static_keys[row]
+            except KeyError:
+                return _make_static_key(row)
+            # Released by `release()`: only cache the name that's in use.
+            self[name] = key
+            return key
+
+        maybe_key = None
         for func in KEY_GENERATORS:
             maybe_key = func(name)
             if maybe_key:
@@ -433,6 +418,11 @@ KC = KeyAttrDict()
 class Key:
     '''Generic Key class with assignable handlers.'''
 
+    # Key classes declare their attributes in `__slots__`, subclasses should do
+    # the same or they get a `__dict__` again. `meta` is left for modules and
+    # user code to attach their own data to any key.
+    __slots__ = ('_on_press', '_on_release', 'meta')
+
     def __init__(
         self,
         on_press: Callable[[object, Key, Keyboard, ...], None] = handlers.passthrough,
@@ -454,6 +444,8 @@ class Key:
 class _DefaultKey(Key):
     '''Meta class implementing handlers for Keys with HID codes.'''
 
+    __slots__ = ('code',)
+
     def __init__(self, code: Optional[int] = None):
         self.code = code
 
@@ -477,10 +469,12 @@ class _DefaultKey(Key):
 
 
 class KeyboardKey(_DefaultKey):
-    pass
+    __slots__ = ()
 
 
 class ModifierKey(_DefaultKey):
+    __slots__ = ()
+
     def __call__(self, key: Key) -> Key:
         # don't duplicate when applying the same modifier twice
         if (
@@ -491,10 +485,12 @@ class ModifierKey(_DefaultKey):
         elif isinstance(key, ModifierKey) and key.code & self.code == key.code:
             return key
 
-        return ModifiedKey(key, self)
+        return _modified_key(key, self)
 
 
 class ModifiedKey(Key):
+    __slots__ = ('key', 'modifier')
+
     def __init__(self, code: [Key, int], modifier: [ModifierKey]):
         # generate from code by maybe_make_shifted_key
         if isinstance(code, int):
@@ -523,6 +519,10 @@ class ModifiedKey(Key):
             keyboard._send_hid()
         keyboard.keys_pressed.add(self.modifier)
         if self.key is not None:
+            # Interned keys can be pressed twice: don't let the key drop the
+            # modifier that was just added.
+            if keyboard.implicit_modifier is self.modifier:
+                keyboard.implicit_modifier = None
             self.key.on_press(keyboard, coord_int)
             if keyboard.implicit_modifier is not None:
                 keyboard.keys_pressed.discard(keyboard.implicit_modifier)
@@ -548,16 +548,42 @@ class ModifiedKey(Key):
         )
 
 
+def _modified_key(code: [Key, int], modifier: ModifierKey) -> ModifiedKey:
+    '''
+    Return the interned `ModifiedKey(code, modifier)`, so that i.e.
+    `KC.LSFT(KC.N1)` written twice, and `KC.EXLM`, are the same key.
+    '''
+    if isinstance(code, ModifiedKey):
+        base = code.key
+        bits = code.modifier.code | modifier.code
+    elif isinstance(code, ModifierKey):
+        base = None
+        bits = code.code | modifier.code
+    else:
+        base = code
+        bits = modifier.code
+    if type(base) is KeyboardKey:
+        base = base.code
+
+    ident = (base, bits)
+    try:
+        return _interned[ident]
+    except KeyError:
+        pass
+    key = _interned[ident] = ModifiedKey(code, modifier)
+    return key
+
+
 class ConsumerKey(_DefaultKey):
-    pass
+    __slots__ = ()
 
 
 class MouseKey(_DefaultKey):
-    pass
+    __slots__ = ()
 
 
 class SpacemouseKey(_DefaultKey):
-    pass
+    __slots__ = ()
 
 
 def make_key(
@@ -585,21 +611,54 @@ def make_key(
     return key
 
 
+def freeze_keys(keys):
+    '''
+    Resolve key names to keys, and nested lists of keys to tuples, i.e. to
+    compile keymaps or key maps of modules.
+    '''
+    if isinstance(keys, str):
+        return KC[keys]
+    if isinstance(keys, (list, tuple)):
+        return tuple(freeze_keys(key) for key in keys)
+    return keys
+
+
 # Argumented keys are implicitly internal, so auto-gen of code
 # is almost certainly the best plan here
 def make_argumented_key(
     names: Tuple[str, ...],
     constructor: [Key, Callable[[...], Key]],
+    intern: bool = False,
     **_kwargs,
 ) -> Key:
+    '''
+    Create a key factory, aliased by `names` in the KC lookup table.
+
+    With `intern`, calls with the same hashable arguments return the same
+    key. Only use it for keys that don't keep any state of their own.
+    '''
 
     def argumented_key(*args, **kwargs) -> Key:
+        if intern:
+            ident = (argumented_key, args, tuple(sorted(kwargs.items())))
+            try:
+                return _interned[ident]
+            except KeyError:
+                pass
+            except TypeError:
+                # Unhashable arguments.
+                ident = None
+
         # This is a very ugly workaround for missing syntax in mpy-cross 8.x
         # and, once EOL, can be replaced by:
         # return constructor(*args, **_kwargs, **kwargs)
         k = _kwargs.copy()
         k.update(**kwargs)
-        return constructor(*args, **k)
+        key = constructor(*args, **k)
+
+        if intern and ident is not None:
+            _interned[ident] = key
+        return key
 
     for name in names:
         KC[name] = argumented_key
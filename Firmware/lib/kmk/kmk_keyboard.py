@@ -3,27 +3,56 @@ try:
 except ImportError:
     pass
 
-from collections import namedtuple
 from keypad import Event as KeyEvent
+from supervisor import ticks_ms
 
-from kmk.hid import BLEHID, USBHID, AbstractHID, HIDModes
-from kmk.keys import KC, Axis, Key
+from time import sleep
+
+from kmk.extensions import Extension
+from kmk.hid import BLEHID, USBHID, AbstractHID, HIDModes, KeysPressed
+from kmk.keys import KC, Key, freeze_keys
+from kmk.kmktime import ticks_add, ticks_diff
 from kmk.modules import Module
+from kmk.ringbuffer import RingBuffer
 from kmk.scanners.keypad import MatrixScanner
-from kmk.scheduler import Task, cancel_task, create_task, get_due_task
-from kmk.utils import Debug
+from kmk.scheduler import (
+    Task,
+    cancel_task,
+    create_task,
+    get_due_task,
+    get_next_deadline,
+)
+from kmk.utils import Debug, debug_error
 
 debug = Debug('kmk.keyboard')
 
-KeyBufferFrame = namedtuple(
-    'KeyBufferFrame', ('key', 'is_pressed', 'int_coord', 'index')
-)
+# Marks entries of the resolved keymap cache that haven't been looked up yet.
+_UNRESOLVED = object()
+
+
+class KeyBufferFrame:
+    '''A reusable slot of the resume buffer.'''
+
+    def __init__(self):
+        self.key = None
+        self.is_pressed = False
+        self.int_coord = None
+        self.index = 0
+        self.timestamp = None
 
 
-def debug_error(module, message: str, error: Exception):
-    if debug.enabled:
-        debug(
-            message, ': ', error.__class__.__name__, ': ', error, name=module.__module__
+class MatrixEvent:
+    '''A reusable slot of the matrix update queue, mirroring `keypad.Event`.'''
+
+    def __init__(self):
+        self.key_number = 0
+        self.pressed = False
+        self.timestamp = 0
+
+    def __repr__(self):
+        return (
+            f'<Event: key_number {self.key_number} '
+            f'{"pressed" if self.pressed else "released"}>'
         )
 
 
@@ -39,11 +68,44 @@ class KMKKeyboard:
         # User-configurable
         self.keymap = []
         self.coord_mapping = None
+        self._coord_index = None
+        self._keymap_cache = None
+        self._keymap_cache_layers = None
 
         self.row_pins = None
         self.col_pins = None
         self.diode_orientation = None
         self.matrix = None
+        # Maximum number of matrix events scanned and handled per main loop
+        # cycle. The default of 1 handles one key per cycle; larger values
+        # drain all pending events (up to this cap) in a single ordered pass.
+        self.max_events_per_cycle = 1
+        # Capacities of the preallocated event queues. Events are never
+        # dropped, overflows are counted in the respective `overflows`: the
+        # matrix queue handles its oldest event right away to make room, the
+        # resume buffer grows.
+        self.matrix_queue_size = 64
+        self.resume_buffer_size = 64
+        # Longest time in ms to sleep at the end of an idle main loop cycle;
+        # 0 disables idle sleep. The sleep ends early when a scheduled task is
+        # due, or when a scanner reports pending events, which is checked every
+        # `idle_poll_ms`. Changes on scanners that can't report pending events
+        # (i.e. digitalio matrices) and inputs polled by modules (i.e. GPIO
+        # encoders) are picked up after the sleep.
+        self.idle_sleep_ms = 0
+        self.idle_poll_ms = 1
+        # Optional `kmk.profiler.Profiler` instance.
+        self.profiler = None
+        # Optional `kmk.latency.LatencyTracer` instance.
+        self.latency_tracer = None
+        # Optional `kmk.trace.TraceRecorder` instance.
+        self.event_trace = None
+        # Run `compile_keymap()` at the end of initialization.
+        self.compile_keymap_on_init = False
+        # Maximum HID reports per second, i.e. the host's polling rate of 1000
+        # or 125. Changes in between are merged into one report. `None` sends
+        # every change right away.
+        self.hid_report_rate = None
 
         self.modules = []
         self.extensions = []
@@ -51,7 +113,7 @@ class KMKKeyboard:
 
         #####
         # Internal State
-        self.keys_pressed = set()
+        self.keys_pressed = KeysPressed()
         self._coordkeys_pressed = {}
         self.implicit_modifier = None
         self.hid_type = HIDModes.USB
@@ -59,24 +121,44 @@ class KMKKeyboard:
         self._hid_helper = None
         self._hid_send_enabled = False
         self.hid_pending = False
+        # `ticks_ms` at which the key event that is currently being processed
+        # occurred. Timing decisions should be made relative to this, not to
+        # the time the event happens to be processed at.
+        self.key_timestamp = 0
         self.matrix_update = None
         self.secondary_matrix_update = None
-        self.matrix_update_queue = []
+        # Further events of the current cycle, in order, following
+        # `matrix_update` and `secondary_matrix_update` respectively.
+        self.matrix_update_batch = []
+        self.secondary_matrix_update_batch = []
+        self.matrix_update_queue = None
+        self._batch_coords = []
         self._trigger_powersave_enable = False
         self._trigger_powersave_disable = False
         self._go_args = None
-        self._resume_buffer = []
-        self._resume_buffer_x = []
+        self._resume_buffer = None
+        self._resume_buffer_x = None
+        self._before_matrix_scan_hooks = ()
+        self._after_matrix_scan_hooks = ()
+        self._before_hid_send_hooks = ()
+        self._after_hid_send_hooks = ()
+        self._powersave_enable_hooks = ()
+        self._powersave_disable_hooks = ()
+        self._key_routes = ()
+        self._route_start = (0,)
+        self._module_index = {}
 
         # this should almost always be PREpended to, replaces
         # former use of reversed_active_layers which had pointless
         # overhead (the underlying list was never used anyway)
         self.active_layers = [0]
 
+        self._init_buffers()
+
     def __repr__(self) -> str:
         return self.__class__.__name__
 
-    def _send_hid(self) -> None:
+    def _send_hid(self, force: bool = False) -> None:
         if not self._hid_send_enabled:
             return
 
@@ -84,30 +166,156 @@ class KMKKeyboard:
             if self.keys_pressed:
                 debug('keys_pressed=', self.keys_pressed)
 
-        self._hid_helper.create_report(self.keys_pressed)
+        # Reports are kept up to date by `keys_pressed`, only rebuild them
+        # when they went out of sync.
+        if self._hid_helper.resync:
+            self._hid_helper.create_report(self.keys_pressed)
+        sent = False
         try:
-            self._hid_helper.send()
+            sent = self._hid_helper.send(force)
         except Exception as err:
             debug_error(self._hid_helper, 'send', err)
 
-        self.hid_pending = False
+        if self.latency_tracer is not None:
+            self.latency_tracer.on_send(
+                sent, self._hid_helper.deferred or self._hid_helper.queued
+            )
+        if self.event_trace is not None:
+            self.event_trace.hid_send(sent)
 
-        for key in self.keys_pressed:
-            if isinstance(key, Axis):
-                key.move(self, 0)
+        # Reports held back by the report rate governor go out on a later cycle,
+        # the ones queued for a busy device are retried by the HID helper.
+        self.hid_pending = self._hid_helper.deferred
+
+        # Axes at rest remove themselves.
+        axes = self.keys_pressed.axes
+        for idx in range(len(axes) - 1, -1, -1):
+            axes[idx].move(self, 0)
 
     def _handle_matrix_report(self, kevent: KeyEvent) -> None:
         if kevent is not None:
             self._on_matrix_changed(kevent)
 
+    def _scan_matrix(self) -> None:
+        '''
+        Poll the scanners for up to `max_events_per_cycle` events. The first
+        event goes to `matrix_update`, any further ones to
+        `matrix_update_batch`.
+        '''
+        budget = self.max_events_per_cycle
+        for matrix in self.matrix:
+            while budget:
+                update = matrix.scan_for_changes()
+                if not update:
+                    break
+                if self.matrix_update is None:
+                    self.matrix_update = update
+                else:
+                    self.matrix_update_batch.append(update)
+                budget -= 1
+            if not budget:
+                break
+
+    def _queue_matrix_update(self, kevent: KeyEvent) -> None:
+        queue = self.matrix_update_queue
+        slot = queue.push()
+        if slot is None:
+            # Out of room: handle the oldest event now, to keep the order.
+            if debug.enabled:
+                debug('matrix update queue overflow at ', kevent)
+            self._handle_matrix_report(queue.pop())
+            if self._resume_buffer:
+                self._process_resume_buffer()
+            if self.hid_pending:
+                self._send_hid()
+            slot = queue.push()
+        slot.key_number = kevent.key_number
+        slot.pressed = kevent.pressed
+        # Events that don't carry a timestamp are stamped on arrival.
+        timestamp = getattr(kevent, 'timestamp', None)
+        slot.timestamp = ticks_ms() if timestamp is None else timestamp
+
+    def _queue_matrix_updates(self) -> None:
+        if self.secondary_matrix_update:
+            self._queue_matrix_update(self.secondary_matrix_update)
+            self.secondary_matrix_update = None
+
+        if self.secondary_matrix_update_batch:
+            for kevent in self.secondary_matrix_update_batch:
+                self._queue_matrix_update(kevent)
+            self.secondary_matrix_update_batch.clear()
+
+        if self.matrix_update:
+            self._queue_matrix_update(self.matrix_update)
+            self.matrix_update = None
+
+        if self.matrix_update_batch:
+            for kevent in self.matrix_update_batch:
+                self._queue_matrix_update(kevent)
+            self.matrix_update_batch.clear()
+
+    def _handle_matrix_updates(self) -> None:
+        '''
+        Handle up to `max_events_per_cycle` queued matrix events in order.
+
+        To preserve causal order within a batch, buffered key events emitted by
+        modules are resumed before the next matrix event is handled, and a
+        pending HID report is flushed before an event for a coordinate that was
+        already handled in the same batch (i.e. the release of a tapped key),
+        so that no state transition is merged away.
+        '''
+        queue = self.matrix_update_queue
+        if not queue:
+            return
+
+        if self.max_events_per_cycle == 1:
+            self._handle_matrix_report(queue.pop())
+            return
+
+        coords = self._batch_coords
+        for _ in range(min(self.max_events_per_cycle, len(queue))):
+            kevent = queue.pop()
+
+            if kevent.key_number in coords:
+                if self.hid_pending:
+                    self._send_hid()
+                coords.clear()
+            coords.append(kevent.key_number)
+
+            self._handle_matrix_report(kevent)
+
+            if self._resume_buffer:
+                self._process_resume_buffer()
+
+        coords.clear()
+
     def _find_key_in_map(self, int_coord: int) -> Key:
+        if self._coord_index is None:
+            self._init_coord_index()
+
         try:
-            idx = self.coord_mapping.index(int_coord)
-        except ValueError:
+            idx = self._coord_index[int_coord]
+        except IndexError:
+            idx = None
+
+        if idx is None:
             if debug.enabled:
                 debug('no such int_coord: ', int_coord)
             return None
 
+        # The cache is only valid for the layer stack it was resolved for;
+        # this also catches direct mutations of `active_layers`.
+        if self.active_layers != self._keymap_cache_layers:
+            self._keymap_cache = [_UNRESOLVED] * len(self.coord_mapping)
+            self._keymap_cache_layers = self.active_layers.copy()
+
+        key = self._keymap_cache[idx]
+        if key is _UNRESOLVED:
+            key = self._keymap_cache[idx] = self._resolve_key(idx)
+
+        return key
+
+    def _resolve_key(self, idx: int) -> Key:
         key = None
         for layer in self.active_layers:
             try:
@@ -121,6 +329,13 @@ class KMKKeyboard:
 
         return key
 
+    def invalidate_keymap_cache(self) -> None:
+        '''
+        Drop all resolved keys. Has to be called after changing `keymap` at
+        runtime; changes to `active_layers` are detected automatically.
+        '''
+        self._keymap_cache_layers = None
+
     def _on_matrix_changed(self, kevent: KeyEvent) -> None:
         int_coord = kevent.key_number
         is_pressed = kevent.pressed
@@ -138,49 +353,86 @@ class KMKKeyboard:
         if debug.enabled:
             debug(kevent, ': ', key)
 
-        self.pre_process_key(key, is_pressed, int_coord)
+        if self.event_trace is not None:
+            self.event_trace.matrix(key, is_pressed, int_coord)
+
+        tracer = self.latency_tracer
+        if tracer is not None:
+            tracer.tag(key, kevent.timestamp)
+
+        key = self.pre_process_key(
+            key, is_pressed, int_coord, timestamp=kevent.timestamp
+        )
+
+        if tracer is not None:
+            tracer.tagged(
+                key is not None and not self._modules_busy(), self.hid_pending
+            )
+
+    def _modules_busy(self) -> bool:
+        '''Whether any module holds back or still has to emit key events.'''
+        if self._resume_buffer:
+            return True
+        for module, _, _, when_active in self._key_routes:
+            if when_active and module.is_active():
+                return True
+        return False
 
     def _process_resume_buffer(self):
         '''
         Resume the processing of buffered, delayed, deferred, etc. key events
         emitted by modules.
 
-        We use a copy of the `_resume_buffer` as a working buffer. The working
-        buffer holds all key events in the correct order for processing. If
-        during processing new events are pushed to the `_resume_buffer`, they
-        are prepended to the working buffer (which may not be emptied), in
-        order to preserve key event order.
-        We also double-buffer `_resume_buffer` with `_resume_buffer_x`, only
-        copying the reference to hopefully safe some time on allocations.
+        We swap the `_resume_buffer` with its (empty) twin `_resume_buffer_x`
+        and use it as the working buffer. The working buffer holds all key
+        events in the correct order for processing. If during processing new
+        events are pushed to the `_resume_buffer`, they are moved to the front
+        of the working buffer, in order to preserve key event order.
+        Both are ring buffers of preallocated frames, which are copied out
+        before they are processed and may be reused.
         '''
 
         buffer, self._resume_buffer = self._resume_buffer, self._resume_buffer_x
 
         while buffer:
-            ksf = buffer.pop(0)
+            ksf = buffer.pop()
             key = ksf.key
+            is_pressed = ksf.is_pressed
+            int_coord = ksf.int_coord
+            index = ksf.index
+            timestamp = ksf.timestamp
 
             # Handle any unaccounted-for layer shifts by looking up the key resolution again.
-            if ksf.int_coord is not None:
-                if ksf.is_pressed:
-                    key = self._find_key_in_map(ksf.int_coord)
+            if int_coord is not None:
+                if is_pressed:
+                    key = self._find_key_in_map(int_coord)
                 else:
-                    key = self._coordkeys_pressed.pop(ksf.int_coord, key)
+                    key = self._coordkeys_pressed.pop(int_coord, key)
+
+            if self.event_trace is not None:
+                self.event_trace.resume(key, is_pressed, int_coord, index)
 
             # Resume the processing of the key event and update the HID report
             # when applicable.
-            self.pre_process_key(key, ksf.is_pressed, ksf.int_coord, ksf.index)
+            self.pre_process_key(key, is_pressed, int_coord, index, timestamp)
 
             if self.hid_pending:
                 self._send_hid()
-                self.hid_pending = False
 
             # Any newly buffered key events must be prepended to the working
-            # buffer.
-            if self._resume_buffer:
-                self._resume_buffer.extend(buffer)
-                buffer.clear()
-                buffer, self._resume_buffer = self._resume_buffer, buffer
+            # buffer, which grows if they don't fit.
+            pending = self._resume_buffer
+            while pending:
+                src = pending.pop_back()
+                dst = buffer.push_front()
+                if dst is None:
+                    buffer.grow(2 * buffer.size)
+                    dst = buffer.push_front()
+                dst.key = src.key
+                dst.is_pressed = src.is_pressed
+                dst.int_coord = src.int_coord
+                dst.index = src.index
+                dst.timestamp = src.timestamp
 
         self._resume_buffer_x = buffer
 
@@ -190,11 +442,33 @@ class KMKKeyboard:
         is_pressed: bool,
         int_coord: Optional[int] = None,
         index: int = 0,
-    ) -> None:
-        for module in self.modules[index:]:
+        timestamp: Optional[int] = None,
+    ) -> Optional[Key]:
+        '''
+        Run a key event through the modules, starting at `index`, and process
+        it if none of them intercepted it. Returns the processed key or `None`.
+        '''
+        if timestamp is None:
+            timestamp = ticks_ms()
+        self.key_timestamp = timestamp
+
+        source = key
+        routes = self._key_routes
+        for idx in range(self._route_start[index], len(routes)):
+            module, key_types, coords, when_active = routes[idx]
+            if (
+                (key_types is not None and not isinstance(key, key_types))
+                or (coords is not None and int_coord not in coords)
+                or (when_active and not module.is_active())
+            ):
+                continue
             try:
                 key = module.process_key(self, key, is_pressed, int_coord)
                 if key is None:
+                    if self.event_trace is not None:
+                        self.event_trace.intercept(
+                            module, source, is_pressed, int_coord
+                        )
                     break
             except Exception as err:
                 debug_error(module, 'process_key', err)
@@ -209,6 +483,8 @@ class KMKKeyboard:
         if key:
             self.process_key(key, is_pressed, int_coord)
 
+        return key
+
     def process_key(
         self, key: Key, is_pressed: bool, int_coord: Optional[int] = None
     ) -> None:
@@ -224,12 +500,38 @@ class KMKKeyboard:
         is_pressed: bool,
         int_coord: Optional[int] = None,
         reprocess: Optional[bool] = False,
+        timestamp: Optional[int] = None,
     ) -> None:
-        index = self.modules.index(module) + (0 if reprocess else 1)
-        ksf = KeyBufferFrame(
-            key=key, is_pressed=is_pressed, int_coord=int_coord, index=index
-        )
-        self._resume_buffer.append(ksf)
+        '''
+        Buffer a key event to be processed by the modules following `module`,
+        or by `module` itself if `reprocess` is set. The `timestamp` of the
+        original event should be passed along if the event is being delayed;
+        it defaults to the time the event is resumed at.
+        '''
+        try:
+            index = self._module_index[module]
+        except KeyError:
+            index = self.modules.index(module)
+        if not reprocess:
+            index += 1
+        ksf = self._resume_buffer.push()
+        if ksf is None:
+            # Out of room. Processing the event right away would reenter the
+            # modules, i.e. while they're flushing their own buffers: grow the
+            # buffer instead.
+            if debug.enabled:
+                debug('resume buffer overflow at ', key)
+            self._resume_buffer.grow(2 * self._resume_buffer.size)
+            ksf = self._resume_buffer.push()
+        ksf.key = key
+        ksf.is_pressed = is_pressed
+        ksf.int_coord = int_coord
+        ksf.index = index
+        ksf.timestamp = timestamp
+
+    def key_event_age(self) -> int:
+        '''Milliseconds passed since the current key event occurred.'''
+        return ticks_diff(ticks_ms(), self.key_timestamp)
 
     def remove_key(self, keycode: Key) -> None:
         self.process_key(keycode, False)
@@ -243,6 +545,8 @@ class KMKKeyboard:
         self.set_timeout(0, lambda: self.remove_key(keycode))
 
     def set_timeout(self, after_ticks: int, callback: Callable[[None], None]) -> [Task]:
+        if self.event_trace is not None:
+            callback = self.event_trace.timeout(after_ticks, callback)
         return create_task(callback, after_ms=after_ticks)
 
     def cancel_timeout(self, timeout_key: int) -> None:
@@ -270,6 +574,25 @@ class KMKKeyboard:
                 cm.extend(m.coord_mapping)
             self.coord_mapping = tuple(cm)
 
+        self._init_coord_index()
+
+    def _init_coord_index(self) -> None:
+        '''
+        Build the inverse of `coord_mapping`, such that
+        `_coord_index[int_coord]` is the keymap index of `int_coord`, or `None`
+        for unmapped coordinates.
+        '''
+        if not self.coord_mapping:
+            self._coord_index = ()
+            return
+
+        index = [None] * (max(self.coord_mapping) + 1)
+        # Iterate backwards so that the first occurrence wins, as with
+        # `coord_mapping.index()`.
+        for idx in range(len(self.coord_mapping) - 1, -1, -1):
+            index[self.coord_mapping[idx]] = idx
+        self._coord_index = tuple(index)
+
     def _init_hid(self) -> None:
         if self.hid_type == HIDModes.NOOP:
             self._hid_helper = AbstractHID
@@ -281,17 +604,36 @@ class KMKKeyboard:
             self._hid_helper = AbstractHID
         self._hid_helper = self._hid_helper(**self._go_args)
         self._hid_send_enabled = True
+        if self.hid_report_rate:
+            self._hid_helper.report_interval = max(1, 1000 // self.hid_report_rate)
+        self._hid_helper.flush = self._flush_hid
+        self.keys_pressed.hid = self._hid_helper
 
         if debug.enabled:
             debug('hid=', self._hid_helper)
 
+    def _flush_hid(self) -> None:
+        '''Send pending reports right away, regardless of `hid_report_rate`.'''
+        self._send_hid(force=True)
+
     def _deinit_hid(self) -> None:
         try:
             self._hid_helper.create_report({})
-            self._hid_helper.send()
+            self._hid_helper.send(force=True)
+            self._hid_helper.resync = True
         except Exception as e:
             debug_error(self, '_deinit_hid', e)
 
+    def _init_buffers(self) -> None:
+        queue = self.matrix_update_queue
+        if queue is None or queue.size != self.matrix_queue_size:
+            self.matrix_update_queue = RingBuffer(self.matrix_queue_size, MatrixEvent)
+
+        buffer = self._resume_buffer
+        if buffer is None or buffer.size != self.resume_buffer_size:
+            self._resume_buffer = RingBuffer(self.resume_buffer_size, KeyBufferFrame)
+            self._resume_buffer_x = RingBuffer(self.resume_buffer_size, KeyBufferFrame)
+
     def _init_matrix(self) -> None:
         if self.matrix is None:
             self.matrix = MatrixScanner(
@@ -341,83 +683,98 @@ class KMKKeyboard:
         if debug.enabled:
             debug('extensions=', [_.__class__.__name__ for _ in self.extensions])
 
-    def before_matrix_scan(self) -> None:
-        for module in self.modules:
-            try:
-                module.before_matrix_scan(self)
-            except Exception as err:
-                debug_error(module, 'before_matrix_scan', err)
+        self.init_hooks()
 
+    def _compile_hook(self, name: str) -> tuple:
+        hooks = []
+        for module in self.modules:
+            if getattr(module.__class__, name) is not getattr(Module, name):
+                hooks.append((module, getattr(module, name), self))
         for ext in self.extensions:
-            try:
-                ext.before_matrix_scan(self.sandbox)
-            except Exception as err:
-                debug_error(ext, 'before_matrix_scan', err)
+            if getattr(ext.__class__, name) is not getattr(Extension, name):
+                hooks.append((ext, getattr(ext, name), self.sandbox))
+        return tuple(hooks)
 
-    def after_matrix_scan(self) -> None:
-        for module in self.modules:
-            try:
-                module.after_matrix_scan(self)
-            except Exception as err:
-                debug_error(module, 'after_matrix_scan', err)
+    def _compile_key_routes(self) -> None:
+        '''
+        Build the `process_key` routing table from the modules' routing hints,
+        and cache each module's position in the pipeline.
+        `_route_start[index]` is the first route belonging to a module at or
+        after `modules[index]`.
+        '''
+        routes = []
+        start = []
+        self._module_index = {}
+        for idx, module in enumerate(self.modules):
+            self._module_index[module] = idx
+            start.append(len(routes))
+            if module.__class__.process_key is not Module.process_key:
+                routes.append(
+                    (
+                        module,
+                        module.route_key_types,
+                        module.route_coords,
+                        module.route_when_active,
+                    )
+                )
+        start.append(len(routes))
+        self._key_routes = tuple(routes)
+        self._route_start = tuple(start)
+
+    def init_hooks(self) -> None:
+        '''
+        Compile the per-cycle hook dispatch tables, containing only modules and
+        extensions that actually override a hook, and the `process_key` routing
+        table. Has to be called again after `modules` or `extensions` are
+        changed at runtime.
+        '''
+        self._compile_key_routes()
+        self._before_matrix_scan_hooks = self._compile_hook('before_matrix_scan')
+        self._after_matrix_scan_hooks = self._compile_hook('after_matrix_scan')
+        self._before_hid_send_hooks = self._compile_hook('before_hid_send')
+        self._after_hid_send_hooks = self._compile_hook('after_hid_send')
+        self._powersave_enable_hooks = self._compile_hook('on_powersave_enable')
+        self._powersave_disable_hooks = self._compile_hook('on_powersave_disable')
 
-        for ext in self.extensions:
-            try:
-                ext.after_matrix_scan(self.sandbox)
-            except Exception as err:
-                debug_error(ext, 'after_matrix_scan', err)
+        if self.profiler is not None:
+            self.profiler.instrument(self)
 
-    def before_hid_send(self) -> None:
-        for module in self.modules:
-            try:
-                module.before_hid_send(self)
-            except Exception as err:
-                debug_error(module, 'before_hid_send', err)
+        if self.event_trace is not None:
+            self.event_trace.attach(self)
 
-        for ext in self.extensions:
-            try:
-                ext.before_hid_send(self.sandbox)
-            except Exception as err:
-                debug_error(ext, 'before_hid_send', err)
+        if debug.enabled:
+            debug(
+                'hooks=',
+                len(self._before_matrix_scan_hooks),
+                len(self._after_matrix_scan_hooks),
+                len(self._before_hid_send_hooks),
+                len(self._after_hid_send_hooks),
+            )
 
-    def after_hid_send(self) -> None:
-        for module in self.modules:
+    def _dispatch(self, hooks: tuple, name: str) -> None:
+        for obj, hook, arg in hooks:
             try:
-                module.after_hid_send(self)
+                hook(arg)
             except Exception as err:
-                debug_error(module, 'after_hid_send', err)
+                debug_error(obj, name, err)
 
-        for ext in self.extensions:
-            try:
-                ext.after_hid_send(self.sandbox)
-            except Exception as err:
-                debug_error(ext, 'after_hid_send', err)
+    def before_matrix_scan(self) -> None:
+        self._dispatch(self._before_matrix_scan_hooks, 'before_matrix_scan')
 
-    def powersave_enable(self) -> None:
-        for module in self.modules:
-            try:
-                module.on_powersave_enable(self)
-            except Exception as err:
-                debug_error(module, 'powersave_enable', err)
+    def after_matrix_scan(self) -> None:
+        self._dispatch(self._after_matrix_scan_hooks, 'after_matrix_scan')
 
-        for ext in self.extensions:
-            try:
-                ext.on_powersave_enable(self.sandbox)
-            except Exception as err:
-                debug_error(ext, 'powersave_enable', err)
+    def before_hid_send(self) -> None:
+        self._dispatch(self._before_hid_send_hooks, 'before_hid_send')
 
-    def powersave_disable(self) -> None:
-        for module in self.modules:
-            try:
-                module.on_powersave_disable(self)
-            except Exception as err:
-                debug_error(module, 'powersave_disable', err)
+    def after_hid_send(self) -> None:
+        self._dispatch(self._after_hid_send_hooks, 'after_hid_send')
 
-        for ext in self.extensions:
-            try:
-                ext.on_powersave_disable(self.sandbox)
-            except Exception as err:
-                debug_error(ext, 'powersave_disable', err)
+    def powersave_enable(self) -> None:
+        self._dispatch(self._powersave_enable_hooks, 'powersave_enable')
+
+    def powersave_disable(self) -> None:
+        self._dispatch(self._powersave_disable_hooks, 'powersave_disable')
 
     def deinit(self) -> None:
         for module in self.modules:
@@ -444,12 +801,14 @@ class KMKKeyboard:
         except Exception as err:
             import traceback
 
+            Debug.flush(force=True)
             traceback.print_exception(err)
         finally:
             debug('cleaning up...')
             self._deinit_hid()
             self.deinit()
             debug('...done')
+            Debug.flush(force=True)
 
             if not debug.enabled:
                 import supervisor
@@ -469,17 +828,53 @@ class KMKKeyboard:
         if debug.enabled:
             debug('Initialising ', self)
 
+        self._init_buffers()
         self._init_hid()
         self._init_matrix()
         self._init_coord_mapping()
         self.during_bootup()
 
+        if self.compile_keymap_on_init:
+            self.compile_keymap()
+
         if debug.enabled:
             import gc
 
             gc.collect()
             debug('mem_info used:', gc.mem_alloc(), ' free:', gc.mem_free())
 
+        # Boot messages are written right away, buffer them from here on.
+        Debug.buffer()
+
+    def compile_keymap(self) -> int:
+        '''
+        Resolve the keymap and the keys held by modules (i.e. encoder maps and
+        combos) to their final key objects, store them in tuples, and release
+        the names of built-in keys from `KC`. Returns the number of bytes that
+        were reclaimed.
+        The keymap can't be modified in place afterwards: assign a new one and
+        call `invalidate_keymap_cache()` instead.
+        '''
+        import gc
+
+        gc.collect()
+        before = gc.mem_free()
+
+        self.keymap = freeze_keys(self.keymap)
+        for module in self.modules:
+            try:
+                module.compile_keymap(self)
+            except Exception as err:
+                debug_error(module, 'compile_keymap', err)
+        self.invalidate_keymap_cache()
+        KC.release()
+
+        gc.collect()
+        reclaimed = gc.mem_free() - before
+        if debug.enabled:
+            debug('compile_keymap: reclaimed ', reclaimed, ' bytes')
+        return reclaimed
+
     def _main_loop(self) -> None:
         self.sandbox.active_layers = self.active_layers.copy()
 
@@ -487,27 +882,15 @@ class KMKKeyboard:
 
         self._process_resume_buffer()
 
-        for matrix in self.matrix:
-            update = matrix.scan_for_changes()
-            if update:
-                self.matrix_update = update
-                break
+        self._scan_matrix()
         self.sandbox.matrix_update = self.matrix_update
         self.sandbox.secondary_matrix_update = self.secondary_matrix_update
 
         self.after_matrix_scan()
 
-        if self.secondary_matrix_update:
-            self.matrix_update_queue.append(self.secondary_matrix_update)
-            self.secondary_matrix_update = None
-
-        if self.matrix_update:
-            self.matrix_update_queue.append(self.matrix_update)
-            self.matrix_update = None
+        self._queue_matrix_updates()
 
-        # only handle one key per cycle.
-        if self.matrix_update_queue:
-            self._handle_matrix_report(self.matrix_update_queue.pop(0))
+        self._handle_matrix_updates()
 
         self.before_hid_send()
 
@@ -526,3 +909,38 @@ class KMKKeyboard:
 
         if self._trigger_powersave_disable:
             self.powersave_disable()
+
+        Debug.flush()
+
+        if self.idle_sleep_ms and self._is_idle():
+            self.idle_sleep(self.idle_sleep_ms)
+
+    def _is_idle(self) -> bool:
+        return not (
+            self.hid_pending
+            or self.matrix_update_queue
+            or self._resume_buffer
+            or self._trigger_powersave_enable
+            or self._trigger_powersave_disable
+        )
+
+    def idle_sleep(self, max_ms: int) -> None:
+        '''
+        Sleep for up to `max_ms`, but only until the next scheduled task is due
+        or a scanner has events pending, whichever comes first.
+        '''
+        due_ms = get_next_deadline()
+        if due_ms is not None and due_ms < max_ms:
+            max_ms = due_ms
+
+        end = ticks_add(ticks_ms(), max_ms)
+        while True:
+            for matrix in self.matrix:
+                if matrix.events_pending():
+                    return
+
+            remaining = ticks_diff(end, ticks_ms())
+            if remaining <= 0:
+                return
+
+            sleep(min(remaining, self.idle_poll_ms) / 1000)
@@ -0,0 +1,158 @@
+'''
+Optional switch-to-report latency tracer.
+
+Every matrix event is tagged with its keypad timestamp and the type of the key
+it resolves to. A tag is completed by the first HID report that is actually
+sent after it, and the latency between the two is recorded in a preallocated
+ring buffer. Reports that are deferred by the report rate governor or a busy
+device keep their tags pending until they're sent. Events that are fully
+handled without changing any report are dropped; events that leave a module
+busy (HoldTap, TapDance, Combos, Macros, ...) wait for the first report that
+follows, for at most `max_latency_ms`. That report isn't necessarily the one
+carrying the event's key, so these samples are approximate and are reported
+separately, their key type suffixed with `~`.
+Enable it with `keyboard.latency_tracer = LatencyTracer()`. Percentiles per key
+type are printed through `Debug` by `report()` or the `LAT_DUMP` key.
+'''
+
+from supervisor import ticks_ms
+
+from kmk.keys import make_key
+from kmk.kmktime import ticks_diff
+from kmk.ringbuffer import RingBuffer
+from kmk.utils import Debug
+
+debug = Debug(__name__)
+
+
+class _Tag:
+    def __init__(self):
+        self.kind = None
+        self.timestamp = 0
+        self.direct = False
+
+
+class _Sample:
+    def __init__(self):
+        self.kind = None
+        self.latency = 0
+        self.approximate = False
+
+
+class LatencyTracer:
+    def __init__(self, size: int = 128, pending: int = 16, max_latency_ms=1000):
+        self.max_latency_ms = max_latency_ms
+        self.samples = RingBuffer(size, _Sample)
+        self._pending = RingBuffer(pending, _Tag)
+        self._tag = None
+
+        make_key(names=('LAT_DUMP',), on_press=lambda *args: self.report())
+        make_key(names=('LAT_RESET',), on_press=lambda *args: self.reset())
+
+    def tag(self, key, timestamp: int) -> None:
+        tag = self._tag = self._pending.push()
+        if tag is None:
+            return
+        tag.kind = key.__class__.__name__
+        tag.timestamp = timestamp
+        tag.direct = False
+
+    def tagged(self, done: bool, hid_pending: bool) -> None:
+        '''
+        Called once the tagged event went through the modules. If no module is
+        still working on it, it's `done`: if it left a HID report pending the
+        next send decides whether it changed anything, otherwise it's dropped.
+        '''
+        tag = self._tag
+        if tag is None:
+            return
+        self._tag = None
+        if not done:
+            return
+        if hid_pending:
+            tag.direct = True
+        else:
+            self._pending.pop_back()
+
+    def on_send(self, sent: bool, deferred: bool = False) -> None:
+        '''
+        Called after every HID send. `deferred` is set if reports were held
+        back by the report rate governor or a busy device, which are sent
+        later and complete the pending tags then.
+        '''
+        pending = self._pending
+        if not pending or (deferred and not sent):
+            return
+
+        # Sends from within module processing complete the current tag early.
+        self._tag = None
+        now = ticks_ms()
+        for _ in range(len(pending)):
+            tag = pending.pop()
+            latency = ticks_diff(now, tag.timestamp)
+            if latency > self.max_latency_ms:
+                continue
+            if sent:
+                self._record(tag.kind, latency, not tag.direct)
+            elif not tag.direct:
+                # Still waiting on a module: keep it. Popping first guarantees
+                # a free slot, which may be the one `tag` occupied.
+                kind = tag.kind
+                timestamp = tag.timestamp
+                tag = pending.push()
+                tag.kind = kind
+                tag.timestamp = timestamp
+                tag.direct = False
+
+    def _record(self, kind: str, latency: int, approximate: bool) -> None:
+        sample = self.samples.push()
+        if sample is None:
+            self.samples.pop()
+            sample = self.samples.push()
+        sample.kind = kind
+        sample.latency = latency
+        sample.approximate = approximate
+
+    def report(self) -> None:
+        if not debug.enabled:
+            return
+
+        latencies = {}
+        samples = self.samples
+        for _ in range(len(samples)):
+            sample = samples.pop()
+            kind = sample.kind
+            latency = sample.latency
+            approximate = sample.approximate
+            key = kind + '~' if approximate else kind
+            try:
+                latencies[key].append(latency)
+            except KeyError:
+                latencies[key] = [latency]
+            # Put it back at the end; the ring isn't full after the pop.
+            sample = samples.push()
+            sample.kind = kind
+            sample.latency = latency
+            sample.approximate = approximate
+
+        for kind, values in latencies.items():
+            values.sort()
+            n = len(values)
+            debug(
+                kind,
+                ': n=',
+                n,
+                ' p50=',
+                values[(n - 1) * 50 // 100],
+                'ms p99=',
+                values[(n - 1) * 99 // 100],
+                'ms max=',
+                values[-1],
+                'ms',
+            )
+            Debug.flush(force=True)
+
+    def reset(self) -> None:
+        self.samples.clear()
+        self._pending.clear()
+        self._tag = None
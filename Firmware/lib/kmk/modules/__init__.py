@@ -10,7 +10,20 @@ class Module:
     consistant manner.
     '''
 
-    # The below methods should be implemented by subclasses
+    # Key event routing: `process_key` is only called on modules that override
+    # it, and only for events matching all of the following filters.
+    # Restrict to instances of these key classes; `None` matches any key.
+    route_key_types = None
+    # Restrict to these int_coords; `None` matches any coordinate.
+    route_coords = None
+    # Restrict to events that happen while `is_active()` returns true.
+    route_when_active = False
+
+    def is_active(self):
+        return True
+
+    # The below methods should be implemented by subclasses. The per-cycle
+    # hooks default to no-ops and are only dispatched to if overridden.
 
     def during_bootup(self, keyboard):
         raise NotImplementedError
@@ -19,28 +32,35 @@ class Module:
         '''
         Return value will be injected as an extra matrix update
         '''
-        raise NotImplementedError
+        return
 
     def after_matrix_scan(self, keyboard):
         '''
         Return value will be replace matrix update if supplied
         '''
-        raise NotImplementedError
+        return
 
     def process_key(self, keyboard, key, is_pressed, int_coord):
         return key
 
     def before_hid_send(self, keyboard):
-        raise NotImplementedError
+        return
 
     def after_hid_send(self, keyboard):
-        raise NotImplementedError
+        return
 
     def on_powersave_enable(self, keyboard):
-        raise NotImplementedError
+        return
 
     def on_powersave_disable(self, keyboard):
-        raise NotImplementedError
+        return
+
+    def compile_keymap(self, keyboard):
+        '''
+        Called by `keyboard.compile_keymap()`: resolve the keys the module
+        holds to their final objects, see `kmk.keys.freeze_keys`.
+        '''
+        return
 
     def deinit(self, keyboard):
         pass
@@ -74,24 +74,6 @@ class AnalogInputs(Module):
             period_ms=self.update_interval,
         )
 
-    def before_matrix_scan(self, keyboard):
-        return
-
-    def after_matrix_scan(self, keyboard):
-        return
-
-    def before_hid_send(self, keyboard):
-        return
-
-    def after_hid_send(self, keyboard):
-        return
-
-    def on_powersave_enable(self, keyboard):
-        return
-
-    def on_powersave_disable(self, keyboard):
-        return
-
     def update(self, keyboard):
         for idx, input in enumerate(self.inputs):
             value = input.update()
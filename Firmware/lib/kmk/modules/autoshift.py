@@ -1,4 +1,5 @@
 from kmk.keys import KC, KeyboardKey
+from kmk.kmktime import ticks_diff
 from kmk.modules import Module
 from kmk.scheduler import cancel_task, create_task
 from kmk.utils import Debug
@@ -13,16 +14,11 @@ class Autoshift(Module):
         self._active = False
         self._task = None
         self._key = None
+        self._timestamp = 0
 
     def during_bootup(self, keyboard):
         self._task = create_task(lambda: self._shift(keyboard), after_ms=-1)
 
-    def before_matrix_scan(self, keyboard):
-        pass
-
-    def after_matrix_scan(self, keyboard):
-        pass
-
     def process_key(self, keyboard, key, is_pressed, int_coord):
         # Unshift on any key event
         if self._active:
@@ -33,6 +29,21 @@ class Autoshift(Module):
         if KC.LSFT in keyboard.keys_pressed:
             return key
 
+        # The tap time ran out before this key event occurred, but the shift
+        # hasn't been processed yet: emit the shifted key ahead of this event.
+        if self._key and (
+            ticks_diff(keyboard.key_timestamp, self._timestamp) >= self.tap_time
+        ):
+            cancel_task(self._task)
+            keyboard.resume_process_key(self, KC.LSFT, True)
+            keyboard.resume_process_key(self, self._key, True)
+            keyboard.resume_process_key(self, KC.LSFT, False)
+            keyboard.resume_process_key(
+                self, key, is_pressed, int_coord, timestamp=keyboard.key_timestamp
+            )
+            self._key = None
+            return
+
         # Ignore rolls from tapped to hold
         if not is_pressed and key is not self._key:
             return key
@@ -44,8 +55,12 @@ class Autoshift(Module):
             and isinstance(key, KeyboardKey)
             and KC.A.code <= key.code <= KC.Z.code
         ):
-            create_task(self._task, after_ms=self.tap_time)
+            create_task(
+                self._task,
+                after_ms=max(0, self.tap_time - keyboard.key_event_age()),
+            )
             self._key = key
+            self._timestamp = keyboard.key_timestamp
         else:
             cancel_task(self._task)
             keyboard.resume_process_key(self, self._key, True)
@@ -55,18 +70,6 @@ class Autoshift(Module):
                 keyboard.resume_process_key(self, key, True)
             self._key = None
 
-    def before_hid_send(self, keyboard):
-        pass
-
-    def after_hid_send(self, keyboard):
-        pass
-
-    def on_powersave_enable(self, keyboard):
-        pass
-
-    def on_powersave_disable(self, keyboard):
-        pass
-
     def _shift(self, keyboard):
         if debug.enabled:
             debug('activate')
@@ -3,6 +3,8 @@ from kmk.modules import Module
 
 
 class CapsWord(Module):
+    route_when_active = True
+
     # default timeout is 8000
     # alphabets, numbers and few more keys will not disable capsword
     def __init__(self, timeout=8000):
@@ -27,8 +29,8 @@ class CapsWord(Module):
     def during_bootup(self, keyboard):
         return
 
-    def before_matrix_scan(self, keyboard):
-        return
+    def is_active(self):
+        return self._cw_active
 
     def process_key(self, keyboard, key, is_pressed, int_coord):
         if not self._cw_active or key == KC.CW:
@@ -58,21 +60,6 @@ class CapsWord(Module):
 
         return key
 
-    def before_hid_send(self, keyboard):
-        return
-
-    def after_hid_send(self, keyboard):
-        return
-
-    def on_powersave_enable(self, keyboard):
-        return
-
-    def on_powersave_disable(self, keyboard):
-        return
-
-    def after_matrix_scan(self, keyboard):
-        return
-
     def process_timeout(self):
         self._cw_active = False
         self._timeout_key = False
@@ -4,8 +4,9 @@ except ImportError:
     pass
 from micropython import const
 
-from kmk.keys import Key, make_key
+from kmk.keys import Key, freeze_keys, make_key
 from kmk.kmk_keyboard import KMKKeyboard
+from kmk.kmktime import ticks_add, ticks_diff
 from kmk.modules import Module
 from kmk.utils import Debug
 
@@ -25,6 +26,7 @@ class Combo:
     timeout = 50
     _remaining = []
     _timeout = None
+    _deadline = 0
     _state = _ComboState.IDLE
     _match_coord = False
 
@@ -110,25 +112,20 @@ class Combos(Module):
     def during_bootup(self, keyboard):
         self.reset(keyboard)
 
-    def before_matrix_scan(self, keyboard):
-        return
-
-    def after_matrix_scan(self, keyboard):
-        return
-
-    def before_hid_send(self, keyboard):
-        return
-
-    def after_hid_send(self, keyboard):
-        return
-
-    def on_powersave_enable(self, keyboard):
-        return
-
-    def on_powersave_disable(self, keyboard):
-        return
+    def compile_keymap(self, keyboard):
+        for combo in self.combos:
+            combo.match = freeze_keys(combo.match)
+            combo.result = freeze_keys(combo.result)
 
     def process_key(self, keyboard, key: Key, is_pressed, int_coord):
+        # Expired combos may flush buffered key events, which have to be
+        # processed before the current one.
+        if self.process_expired(keyboard):
+            keyboard.resume_process_key(
+                self, key, is_pressed, int_coord, True, keyboard.key_timestamp
+            )
+            return None
+
         if is_pressed:
             return self.on_press(keyboard, key, int_coord)
         else:
@@ -150,15 +147,15 @@ class Combos(Module):
             combo._state = _ComboState.IDLE
             if combo._timeout:
                 keyboard.cancel_timeout(combo._timeout)
-            combo._timeout = keyboard.set_timeout(
-                combo.timeout, lambda c=combo: self.reset_combo(keyboard, c)
+            self.set_timeout(
+                keyboard, combo, lambda c=combo: self.reset_combo(keyboard, c)
             )
 
         match_count = self.count_matching()
 
         if match_count:
             # At least one combo matches current key: append key to buffer.
-            self._key_buffer.append((int_coord, key, True))
+            self._key_buffer.append((int_coord, key, True, keyboard.key_timestamp))
             key = None
 
             for first_match in self.combos:
@@ -184,13 +181,13 @@ class Combos(Module):
                         keyboard.cancel_timeout(combo._timeout)
                     else:
                         continue
-                combo._timeout = keyboard.set_timeout(
-                    combo.timeout, lambda c=combo: self.on_timeout(keyboard, c)
+                self.set_timeout(
+                    keyboard, combo, lambda c=combo: self.on_timeout(keyboard, c)
                 )
         else:
             # There's no matching combo: send and reset key buffer
             if self._key_buffer:
-                self._key_buffer.append((int_coord, key, True))
+                self._key_buffer.append((int_coord, key, True, keyboard.key_timestamp))
                 self.send_key_buffer(keyboard)
                 self._key_buffer = []
                 key = None
@@ -250,7 +247,9 @@ class Combos(Module):
                 elif len(combo._remaining) == len(combo.match) - 1:
                     self.reset_combo(keyboard, combo)
                     if not self.count_matching():
-                        self._key_buffer.append((int_coord, key, False))
+                        self._key_buffer.append(
+                            (int_coord, key, False, keyboard.key_timestamp)
+                        )
                         self.send_key_buffer(keyboard)
                         self._key_buffer = []
                         key = None
@@ -262,10 +261,12 @@ class Combos(Module):
             # Don't propagate key-release events for keys that have been
             # buffered. Append release events only if corresponding press is in
             # buffer.
-            pressed = self._key_buffer.count((int_coord, key, True))
-            released = self._key_buffer.count((int_coord, key, False))
-            if (pressed - released) > 0:
-                self._key_buffer.append((int_coord, key, False))
+            pressed = 0
+            for _int_coord, _key, _is_pressed, _ in self._key_buffer:
+                if _int_coord == int_coord and _key == key:
+                    pressed += 1 if _is_pressed else -1
+            if pressed > 0:
+                self._key_buffer.append((int_coord, key, False, keyboard.key_timestamp))
                 key = None
 
         # Reset on non-combo key up
@@ -294,9 +295,33 @@ class Combos(Module):
                 self._key_buffer = []
             self.reset_combo(keyboard, combo)
 
+    def set_timeout(self, keyboard, combo, callback):
+        '''Start the combo timeout, counted from the current key event.'''
+        combo._deadline = ticks_add(keyboard.key_timestamp, combo.timeout)
+        combo._timeout = keyboard.set_timeout(
+            max(0, combo.timeout - keyboard.key_event_age()), callback
+        )
+
+    def process_expired(self, keyboard):
+        '''
+        Resolve timeouts of matching combos that expired before the current key
+        event occurred, but haven't been processed yet.
+        '''
+        expired = False
+        for combo in self.combos:
+            if combo._state != _ComboState.MATCHING or combo._timeout is None:
+                continue
+            if ticks_diff(keyboard.key_timestamp, combo._deadline) >= 0:
+                keyboard.cancel_timeout(combo._timeout)
+                self.on_timeout(keyboard, combo)
+                expired = True
+        return expired
+
     def send_key_buffer(self, keyboard):
-        for int_coord, key, is_pressed in self._key_buffer:
-            keyboard.resume_process_key(self, key, is_pressed, int_coord)
+        for int_coord, key, is_pressed, timestamp in self._key_buffer:
+            keyboard.resume_process_key(
+                self, key, is_pressed, int_coord, timestamp=timestamp
+            )
 
     def activate(self, keyboard, combo):
         if debug.enabled:
@@ -9,6 +9,8 @@ from kmk.modules import Module
 
 
 class DynamicSequenceKey(Key):
+    __slots__ = ('sequence_select',)
+
     def __init__(self, sequence_select=None, **kwargs):
         super().__init__(**kwargs)
         self.sequence_select = sequence_select
@@ -125,7 +127,7 @@ class DynamicSequences(Module):
 
     # Add the current keypress state to the sequence
     def record_frame(self, keys_pressed):
-        if self.current_slot.sequence_data[self.index].keys_pressed != keys_pressed:
+        if keys_pressed != self.current_slot.sequence_data[self.index].keys_pressed:
             self.index += 1
 
             # Recorded speed
@@ -228,12 +230,6 @@ class DynamicSequences(Module):
     def during_bootup(self, keyboard):
         return
 
-    def before_matrix_scan(self, keyboard):
-        return
-
-    def after_matrix_scan(self, keyboard):
-        return
-
     def before_hid_send(self, keyboard):
 
         if not self.status:
@@ -250,12 +246,3 @@ class DynamicSequences(Module):
             or self.status == SequenceStatus.SET_INTERVAL
         ):
             self.config_mode(keyboard)
-
-    def after_hid_send(self, keyboard):
-        return
-
-    def on_powersave_enable(self, keyboard):
-        return
-
-    def on_powersave_disable(self, keyboard):
-        return
@@ -4,6 +4,7 @@ import busio
 import digitalio
 from supervisor import ticks_ms
 
+from kmk.keys import freeze_keys
 from kmk.modules import Module
 from kmk.utils import Debug
 
@@ -289,6 +290,10 @@ class EncoderHandler(Module):
                         debug(e)
         return
 
+    def compile_keymap(self, keyboard):
+        if self.map:
+            self.map = freeze_keys(self.map)
+
     def on_move_do(self, keyboard, encoder_id, state):
         if self.map:
             layer_id = keyboard.active_layers[0]
@@ -314,21 +319,3 @@ class EncoderHandler(Module):
             encoder.update_state()
 
         return keyboard
-
-    def after_matrix_scan(self, keyboard):
-        '''
-        Return value will be replace matrix update if supplied
-        '''
-        return
-
-    def before_hid_send(self, keyboard):
-        return
-
-    def after_hid_send(self, keyboard):
-        return
-
-    def on_powersave_enable(self, keyboard):
-        return
-
-    def on_powersave_disable(self, keyboard):
-        return
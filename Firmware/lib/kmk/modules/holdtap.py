@@ -1,6 +1,7 @@
 from micropython import const
 
 from kmk.keys import Key, make_argumented_key
+from kmk.kmktime import ticks_diff
 from kmk.modules import Module
 from kmk.utils import Debug
 
@@ -23,14 +24,24 @@ class HoldTapRepeat:
 
 
 class HoldTapKeyState:
-    def __init__(self, timeout_key, *args, **kwargs):
+    def __init__(self, timeout_key, timestamp, *args, **kwargs):
         self.timeout_key = timeout_key
+        self.timestamp = timestamp
         self.args = args
         self.kwargs = kwargs
         self.activated = ActivationType.PRESSED
 
 
 class HoldTapKey(Key):
+    __slots__ = (
+        'tap',
+        'hold',
+        'prefer_hold',
+        'tap_interrupted',
+        'tap_time',
+        'repeat',
+    )
+
     def __init__(
         self,
         tap,
@@ -52,6 +63,7 @@ class HoldTapKey(Key):
 
 class HoldTap(Module):
     tap_time = 300
+    route_when_active = True
 
     def __init__(self, _make_key=True):
         self.key_buffer = []
@@ -68,14 +80,19 @@ class HoldTap(Module):
     def during_bootup(self, keyboard):
         return
 
-    def before_matrix_scan(self, keyboard):
-        return
-
-    def after_matrix_scan(self, keyboard):
-        return
+    def is_active(self):
+        return bool(self.key_states)
 
     def process_key(self, keyboard, key, is_pressed, int_coord):
         '''Handle holdtap being interrupted by another key press/release.'''
+        # Holds that timed out before the current key event have to be
+        # activated before it is processed.
+        if self.resolve_expired(keyboard, key):
+            keyboard.resume_process_key(
+                self, key, is_pressed, int_coord, True, keyboard.key_timestamp
+            )
+            return None
+
         current_key = key
         send_buffer = False
         append_buffer = False
@@ -115,7 +132,9 @@ class HoldTap(Module):
         # apply changes with 'side-effects' on key_states or the loop behaviour
         # outside the loop.
         if append_buffer:
-            self.key_buffer.append((int_coord, current_key, is_pressed))
+            self.key_buffer.append(
+                (int_coord, current_key, is_pressed, keyboard.key_timestamp)
+            )
             current_key = None
 
         if send_buffer:
@@ -123,24 +142,19 @@ class HoldTap(Module):
 
         return current_key
 
-    def before_hid_send(self, keyboard):
-        return
-
-    def after_hid_send(self, keyboard):
-        return
-
-    def on_powersave_enable(self, keyboard):
-        return
-
-    def on_powersave_disable(self, keyboard):
-        return
-
     def ht_pressed(self, key, keyboard, *args, **kwargs):
         '''Unless in repeat mode, do nothing yet, action resolves when key is released, timer expires or other key is pressed.'''
         if key in self.key_states:
             state = self.key_states[key]
             keyboard.cancel_timeout(self.key_states[key].timeout_key)
 
+            # the repeat window ran out before this key event occurred.
+            if state.activated == ActivationType.RELEASED and self.tap_time_expired(
+                key, state, keyboard
+            ):
+                del self.key_states[key]
+                return self.ht_pressed(key, keyboard, *args, **kwargs)
+
             if state.activated == ActivationType.RELEASED:
                 state.activated = ActivationType.REPEAT
                 self.ht_activate_tap(key, keyboard, *args, **kwargs)
@@ -150,15 +164,13 @@ class HoldTap(Module):
                 self.ht_activate_on_interrupt(key, keyboard, *args, **kwargs)
             return
 
-        if key.tap_time is None:
-            tap_time = self.tap_time
-        else:
-            tap_time = key.tap_time
         timeout_key = keyboard.set_timeout(
-            tap_time,
+            self.tap_time_remaining(key, keyboard),
             lambda: self.on_tap_time_expired(key, keyboard, *args, **kwargs),
         )
-        self.key_states[key] = HoldTapKeyState(timeout_key, *args, **kwargs)
+        self.key_states[key] = HoldTapKeyState(
+            timeout_key, keyboard.key_timestamp, *args, **kwargs
+        )
         return keyboard
 
     def ht_released(self, key, keyboard, *args, **kwargs):
@@ -170,6 +182,12 @@ class HoldTap(Module):
         keyboard.cancel_timeout(state.timeout_key)
         repeat = key.repeat & HoldTapRepeat.TAP
 
+        # released after tap time, but before the timeout was processed.
+        if state.activated == ActivationType.PRESSED and self.tap_time_expired(
+            key, state, keyboard
+        ):
+            self.on_tap_time_expired(key, keyboard, *args, **kwargs)
+
         if state.activated == ActivationType.HOLD_TIMEOUT:
             # release hold
             self.ht_deactivate_hold(key, keyboard, *args, **kwargs)
@@ -192,12 +210,10 @@ class HoldTap(Module):
 
         # don't delete the key state right now in this case
         if repeat:
-            if key.tap_time is None:
-                tap_time = self.tap_time
-            else:
-                tap_time = key.tap_time
+            state.timestamp = keyboard.key_timestamp
             state.timeout_key = keyboard.set_timeout(
-                tap_time, lambda: self.key_states.pop(key)
+                self.tap_time_remaining(key, keyboard),
+                lambda: self.key_states.pop(key),
             )
         else:
             del self.key_states[key]
@@ -223,13 +239,45 @@ class HoldTap(Module):
             self.ht_deactivate_tap(key, keyboard, *args, **kwargs)
             del self.key_states[key]
 
+    def get_tap_time(self, key):
+        if key.tap_time is None:
+            return self.tap_time
+        return key.tap_time
+
+    def tap_time_remaining(self, key, keyboard):
+        '''Time left until the tap time, counted from the current key event.'''
+        return max(0, self.get_tap_time(key) - keyboard.key_event_age())
+
+    def tap_time_expired(self, key, state, keyboard):
+        '''Whether the tap time ran out before the current key event.'''
+        return ticks_diff(keyboard.key_timestamp, state.timestamp) >= self.get_tap_time(
+            key
+        )
+
+    def resolve_expired(self, keyboard, current_key):
+        '''
+        Activate holds whose tap time ran out before the current key event
+        occurred, but whose timeout hasn't been processed yet.
+        '''
+        expired = False
+        for key, state in self.key_states.items():
+            if key == current_key or state.activated != ActivationType.PRESSED:
+                continue
+            if self.tap_time_expired(key, state, keyboard):
+                keyboard.cancel_timeout(state.timeout_key)
+                self.on_tap_time_expired(key, keyboard, *state.args, **state.kwargs)
+                expired = True
+        return expired
+
     def send_key_buffer(self, keyboard):
         if not self.key_buffer:
             return
 
         reprocess = False
-        for int_coord, key, is_pressed in self.key_buffer:
-            keyboard.resume_process_key(self, key, is_pressed, int_coord, reprocess)
+        for int_coord, key, is_pressed, timestamp in self.key_buffer:
+            keyboard.resume_process_key(
+                self, key, is_pressed, int_coord, reprocess, timestamp
+            )
             if isinstance(key, HoldTapKey):
                 reprocess = True
 
@@ -16,6 +16,8 @@ debug = Debug(__name__)
 
 
 class MidiKey(Key):
+    __slots__ = ('on_press_msg', 'on_release_msg')
+
     def __init__(self, *args, command, channel=None, **kwargs):
         super().__init__(**kwargs)
         self.on_press_msg = command(*args, channel=channel)
@@ -82,27 +84,6 @@ class MidiKeys(Module):
     def during_bootup(self, keyboard):
         return None
 
-    def before_matrix_scan(self, keyboard):
-        return None
-
-    def after_matrix_scan(self, keyboard):
-        return None
-
-    def process_key(self, keyboard, key, is_pressed, int_coord):
-        return key
-
-    def before_hid_send(self, keyboard):
-        return None
-
-    def after_hid_send(self, keyboard):
-        return None
-
-    def on_powersave_enable(self, keyboard):
-        return None
-
-    def on_powersave_disable(self, keyboard):
-        return None
-
     def send(self, message):
         if self.midi:
             self.midi.send(message)
@@ -25,24 +25,6 @@ class MouseJiggler(Module):
             period_ms=self.period_ms,
         )
 
-    def before_matrix_scan(self, keyboard):
-        return
-
-    def after_matrix_scan(self, keyboard):
-        return
-
-    def before_hid_send(self, keyboard):
-        return
-
-    def after_hid_send(self, keyboard):
-        return
-
-    def on_powersave_enable(self, keyboard):
-        return
-
-    def on_powersave_disable(self, keyboard):
-        return
-
     def start(self, *args, **kwargs):
         if not self._is_jiggling:
             self._task.restart()
@@ -15,11 +15,14 @@ _WR = const(0x80)
 
 
 class MouseKeys(Module):
-    def __init__(self, max_speed=10, acc_interval=20, move_step=1):
+    def __init__(self, max_speed=10, acc_interval=20, move_step=1, scroll_step=1):
         self._movement = 0
         self.max_speed = max_speed
         self.acc_interval = acc_interval
         self.move_step = move_step
+        # Detents per wheel step, fractions add up over steps, or are sent as
+        # such with a high resolution pointer.
+        self.scroll_step = scroll_step
 
         codes = (
             (0x01, ('MB_LMB',)),
@@ -51,24 +54,6 @@ class MouseKeys(Module):
         )
         cancel_task(self._task)
 
-    def before_matrix_scan(self, keyboard):
-        return
-
-    def after_matrix_scan(self, keyboard):
-        return
-
-    def before_hid_send(self, keyboard):
-        return
-
-    def after_hid_send(self, keyboard):
-        return
-
-    def on_powersave_enable(self, keyboard):
-        return
-
-    def on_powersave_disable(self, keyboard):
-        return
-
     def _move(self, keyboard):
         if self._movement & (_MR + _ML + _MD + _MU):
             if self.move_step < self.max_speed:
@@ -83,13 +68,13 @@ class MouseKeys(Module):
                 AX.X.move(keyboard, self.move_step)
 
         if self._movement & _WU:
-            AX.W.move(keyboard, 1)
+            AX.W.move(keyboard, self.scroll_step)
         if self._movement & _WD:
-            AX.W.move(keyboard, -1)
+            AX.W.move(keyboard, -self.scroll_step)
         if self._movement & _WL:
-            AX.P.move(keyboard, -1)
+            AX.P.move(keyboard, -self.scroll_step)
         if self._movement & _WR:
-            AX.P.move(keyboard, 1)
+            AX.P.move(keyboard, self.scroll_step)
 
     def _maybe_start_move(self, mask):
         self._movement |= mask
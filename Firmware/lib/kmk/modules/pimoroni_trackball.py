@@ -65,6 +65,8 @@ class ScrollDirection:
 
 
 class TrackballHandlerKey(Key):
+    __slots__ = ('handler',)
+
     def __init__(self, handler=TrackballMode.MOUSE_MODE, **kwargs):
         super().__init__(**kwargs)
         self.handler = handler
@@ -205,21 +207,6 @@ class Trackball(Module):
 
         self.current_handler.handle(keyboard, self, x, y, switch, state)
 
-    def after_matrix_scan(self, keyboard):
-        return
-
-    def before_hid_send(self, keyboard):
-        return
-
-    def after_hid_send(self, keyboard):
-        return
-
-    def on_powersave_enable(self, keyboard):
-        return
-
-    def on_powersave_disable(self, keyboard):
-        return
-
     def set_rgbw(self, r, g, b, w):
         '''Set all LED brightness as RGBW.'''
         self._i2c_rdwr([_REG_LED_RED, r, g, b, w])
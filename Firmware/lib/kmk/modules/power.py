@@ -2,8 +2,6 @@ import board
 import digitalio
 from supervisor import ticks_ms
 
-from time import sleep
-
 from kmk.keys import make_key
 from kmk.kmktime import check_deadline
 from kmk.modules import Module
@@ -39,19 +37,13 @@ class Power(Module):
     def during_bootup(self, keyboard):
         self._i2c_scan()
 
-    def before_matrix_scan(self, keyboard):
-        return
-
     def after_matrix_scan(self, keyboard):
         if keyboard.matrix_update or keyboard.secondary_matrix_update:
             self.psave_time_reset()
 
-    def before_hid_send(self, keyboard):
-        return
-
     def after_hid_send(self, keyboard):
         if self.enable:
-            self.psleep()
+            self.psleep(keyboard)
 
     def on_powersave_enable(self, keyboard):
         '''Gives 10 cycles to allow other extensions to clean up before powersave'''
@@ -93,14 +85,15 @@ class Power(Module):
         self.enable = False
         return
 
-    def psleep(self):
+    def psleep(self, keyboard):
         '''
         Sleeps longer and longer to save power the more time in between updates.
+        Wakes up early for scheduled tasks and pending key events.
         '''
         if check_deadline(ticks_ms(), self._powersave_start, 60000):
-            sleep(8 / 1000)
+            keyboard.idle_sleep(8)
         elif check_deadline(ticks_ms(), self._powersave_start, 240000) is False:
-            sleep(180 / 1000)
+            keyboard.idle_sleep(180)
         return
 
     def psave_time_reset(self):
@@ -14,6 +14,17 @@ _ACTIVE = const(2)
 
 
 class RapidFireKey(Key):
+    __slots__ = (
+        'key',
+        'interval',
+        'timeout',
+        'enable_interval_randomization',
+        'randomization_magnitude',
+        'toggle',
+        '_state',
+        '_timeout',
+    )
+
     def __init__(
         self,
         key,
@@ -98,21 +109,3 @@ class RapidFire(Module):
 
     def during_bootup(self, keyboard):
         return
-
-    def before_matrix_scan(self, keyboard):
-        return
-
-    def before_hid_send(self, keyboard):
-        return
-
-    def after_hid_send(self, keyboard):
-        return
-
-    def on_powersave_enable(self, keyboard):
-        return
-
-    def on_powersave_disable(self, keyboard):
-        return
-
-    def after_matrix_scan(self, keyboard):
-        return
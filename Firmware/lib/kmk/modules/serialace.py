@@ -15,15 +15,6 @@ class SerialACE(Module):
         except AttributeError:
             pass
 
-    def before_matrix_scan(self, keyboard):
-        pass
-
-    def after_matrix_scan(self, keyboard):
-        pass
-
-    def process_key(self, keyboard, key, is_pressed, int_coord):
-        return key
-
     def before_hid_send(self, keyboard):
         # Serial.data isn't initialized.
         if not data:
@@ -52,12 +43,3 @@ class SerialACE(Module):
         except Exception as err:
             if debug.enabled:
                 debug(f'error: {err}')
-
-    def after_hid_send(self, keyboard):
-        pass
-
-    def on_powersave_enable(self, keyboard):
-        pass
-
-    def on_powersave_disable(self, keyboard):
-        pass
@@ -19,6 +19,8 @@ _CD = const(0x800)
 
 
 class SpacemouseDirectionKey(Key):
+    __slots__ = ('code',)
+
     def __init__(self, code, **kwargs):
         super().__init__(**kwargs)
         self.code = code
@@ -72,24 +74,6 @@ class SpacemouseKeys(Module):
         )
         cancel_task(self._task)
 
-    def before_matrix_scan(self, keyboard):
-        return
-
-    def after_matrix_scan(self, keyboard):
-        return
-
-    def before_hid_send(self, keyboard):
-        return
-
-    def after_hid_send(self, keyboard):
-        return
-
-    def on_powersave_enable(self, keyboard):
-        return
-
-    def on_powersave_disable(self, keyboard):
-        return
-
     def _move(self, keyboard):
         if self._movement:
             if self._move_step < self.max_speed:
@@ -164,6 +164,8 @@ class Split(Module):
         if not keyboard.coord_mapping and debug.enabled:
             debug('Error: please provide coord_mapping for custom scanner')
 
+        keyboard._init_coord_index()
+
         if self.split_side == SplitSide.RIGHT:
             offset = self.split_offset
             for matrix in keyboard.matrix:
@@ -183,30 +185,32 @@ class Split(Module):
 
     def after_matrix_scan(self, keyboard):
         if keyboard.matrix_update:
-            if self.split_type == SplitType.UART:
-                if not self._is_target or self.data_pin2:
-                    self._send_uart(keyboard.matrix_update)
-                else:
-                    pass  # explicit pass just for dev sanity...
-            elif self.split_type == SplitType.BLE:
-                self._send_ble(keyboard.matrix_update)
-            elif self.split_type == SplitType.ONEWIRE:
-                pass  # Protocol needs written
-            else:
-                if debug.enabled:
-                    debug('Unexpected case in after_matrix_scan')
+            self._send_update(keyboard.matrix_update)
+            for update in keyboard.matrix_update_batch:
+                self._send_update(update)
 
         return
 
+    def _send_update(self, update):
+        if self.split_type == SplitType.UART:
+            if not self._is_target or self.data_pin2:
+                self._send_uart(update)
+            else:
+                pass  # explicit pass just for dev sanity...
+        elif self.split_type == SplitType.BLE:
+            self._send_ble(update)
+        elif self.split_type == SplitType.ONEWIRE:
+            pass  # Protocol needs written
+        else:
+            if debug.enabled:
+                debug('Unexpected case in after_matrix_scan')
+
     def before_hid_send(self, keyboard):
         if not self._is_target:
             keyboard.hid_pending = False
 
         return
 
-    def after_hid_send(self, keyboard):
-        return
-
     def on_powersave_enable(self, keyboard):
         if self.split_type == SplitType.BLE:
             if self._uart_connection and not self._psave_enable:
@@ -355,7 +359,16 @@ class Split(Module):
                 update = self._deserialize_update(self._uart.read(2))
                 self._uart_buffer.append(update)
             if self._uart_buffer:
-                keyboard.secondary_matrix_update = self._uart_buffer.pop(0)
+                self._forward_uart_buffer(keyboard)
+
+    def _forward_uart_buffer(self, keyboard):
+        keyboard.secondary_matrix_update = self._uart_buffer.pop(0)
+
+        # In batched mode, hand over as many further events as the keyboard
+        # handles per cycle, preserving their order.
+        batch = keyboard.secondary_matrix_update_batch
+        while self._uart_buffer and len(batch) < keyboard.max_events_per_cycle - 1:
+            batch.append(self._uart_buffer.pop(0))
 
     def _checksum(self, update):
         checksum = bytes([sum(update) & 0xFF])
@@ -388,4 +401,4 @@ class Split(Module):
                     if self._checksum(update) == self._uart.read(1):
                         self._uart_buffer.append(self._deserialize_update(update))
             if self._uart_buffer:
-                keyboard.secondary_matrix_update = self._uart_buffer.pop(0)
+                self._forward_uart_buffer(keyboard)
@@ -52,6 +52,8 @@ STENO_KEYS = (
 
 
 class StenoKey(Key):
+    __slots__ = ('code',)
+
     def __init__(self, code, **kwargs):
         super().__init__(**kwargs)
         self.code = code
@@ -91,24 +93,3 @@ class Steno(Module):
 
     def during_bootup(self, keyboard):
         pass
-
-    def before_matrix_scan(self, keyboard):
-        pass
-
-    def after_matrix_scan(self, keyboard):
-        pass
-
-    def process_key(self, keyboard, key, is_pressed, int_coord):
-        return key
-
-    def before_hid_send(self, keyboard):
-        pass
-
-    def after_hid_send(self, keyboard):
-        pass
-
-    def on_powersave_enable(self, keyboard):
-        pass
-
-    def on_powersave_disable(self, keyboard):
-        pass
@@ -15,6 +15,8 @@ _SK_STICKY = const(4)
 
 
 class StickyKey(Key):
+    __slots__ = ('key', 'defer_release', 'timeout', 'state', 'retap_cancel')
+
     def __init__(self, key, defer_release=False, retap_cancel=True, **kwargs):
         super().__init__(**kwargs)
         self.key = key
@@ -25,6 +27,8 @@ class StickyKey(Key):
 
 
 class StickyKeys(Module):
+    route_when_active = True
+
     def __init__(self, release_after=1000):
         self.active_keys = []
         self.release_after = release_after
@@ -39,23 +43,8 @@ class StickyKeys(Module):
     def during_bootup(self, keyboard):
         return
 
-    def before_matrix_scan(self, keyboard):
-        return
-
-    def after_matrix_scan(self, keyboard):
-        return
-
-    def before_hid_send(self, keyboard):
-        return
-
-    def after_hid_send(self, keyboard):
-        return
-
-    def on_powersave_enable(self, keyboard):
-        return
-
-    def on_powersave_disable(self, keyboard):
-        return
+    def is_active(self):
+        return bool(self.active_keys)
 
     def process_key(self, keyboard, current_key, is_pressed, int_coord):
         delay_current = False
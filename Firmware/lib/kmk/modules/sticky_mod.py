@@ -3,6 +3,8 @@ from kmk.modules import Module
 
 
 class StickyModKey(Key):
+    __slots__ = ('key', 'mod')
+
     def __init__(self, key, mod, **kwargs):
         super().__init__(**kwargs)
         self.key = key
@@ -10,6 +12,8 @@ class StickyModKey(Key):
 
 
 class StickyMod(Module):
+    route_when_active = True
+
     def __init__(self):
         self._active = False
         self._active_key = None
@@ -23,8 +27,8 @@ class StickyMod(Module):
     def during_bootup(self, keyboard):
         return
 
-    def before_matrix_scan(self, keyboard):
-        return
+    def is_active(self):
+        return self._active
 
     def process_key(self, keyboard, key, is_pressed, int_coord):
         # release previous key if any other key is pressed
@@ -33,21 +37,6 @@ class StickyMod(Module):
 
         return key
 
-    def before_hid_send(self, keyboard):
-        return
-
-    def after_hid_send(self, keyboard):
-        return
-
-    def on_powersave_enable(self, keyboard):
-        return
-
-    def on_powersave_disable(self, keyboard):
-        return
-
-    def after_matrix_scan(self, keyboard):
-        return
-
     def release_key(self, keyboard, key):
         keyboard.process_key(key.mod, False)
         self._active = False
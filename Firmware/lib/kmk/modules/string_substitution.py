@@ -171,9 +171,6 @@ class StringSubstitution(Module):
     def during_bootup(self, keyboard):
         return
 
-    def before_matrix_scan(self, keyboard):
-        return
-
     def before_hid_send(self, keyboard):
 
         if self._state == State.LISTENING:
@@ -215,15 +212,3 @@ class StringSubstitution(Module):
                 self._matched_rule = None
                 for rule in self._rules:
                     rule.restart()
-
-    def after_hid_send(self, keyboard):
-        return
-
-    def on_powersave_enable(self, keyboard):
-        return
-
-    def on_powersave_disable(self, keyboard):
-        return
-
-    def after_matrix_scan(self, keyboard):
-        return
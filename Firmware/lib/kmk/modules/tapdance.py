@@ -3,6 +3,8 @@ from kmk.modules.holdtap import ActivationType, HoldTap, HoldTapKey
 
 
 class TapDanceKey(Key):
+    __slots__ = ('tap_time', 'keys')
+
     def __init__(self, *keys, tap_time=None, **kwargs):
         '''
         Any key in the tapdance sequence that is not already a holdtap
@@ -51,7 +53,13 @@ class TapDance(HoldTap):
                 self.ht_activate_tap(_key, keyboard)
                 self.send_key_buffer(keyboard)
                 self.ht_deactivate_tap(_key, keyboard)
-                keyboard.resume_process_key(self, key, is_pressed, int_coord)
+                keyboard.resume_process_key(
+                    self,
+                    key,
+                    is_pressed,
+                    int_coord,
+                    timestamp=keyboard.key_timestamp,
+                )
                 key = None
 
                 del self.key_states[_key]
@@ -63,6 +71,17 @@ class TapDance(HoldTap):
         return key
 
     def td_pressed(self, key, keyboard, *args, **kwargs):
+        # tap dance timed out before this key event occurred, but the timeout
+        # hasn't been processed yet.
+        if key in self.td_counts:
+            kc = key.keys[self.td_counts[key]]
+            state = self.key_states[kc]
+            if state.activated == ActivationType.RELEASED and self.tap_time_expired(
+                kc, state, keyboard
+            ):
+                keyboard.cancel_timeout(state.timeout_key)
+                self.on_tap_time_expired(kc, keyboard)
+
         # active tap dance
         if key in self.td_counts:
             count = self.td_counts[key]
@@ -96,6 +115,14 @@ class TapDance(HoldTap):
     def td_released(self, key, keyboard, *args, **kwargs):
         kc = key.keys[self.td_counts[key]]
         state = self.key_states[kc]
+
+        # released after tap time, but before the timeout was processed.
+        if state.activated == ActivationType.PRESSED and self.tap_time_expired(
+            kc, state, keyboard
+        ):
+            keyboard.cancel_timeout(state.timeout_key)
+            self.on_tap_time_expired(kc, keyboard, *args, **kwargs)
+
         if state.activated == ActivationType.HOLD_TIMEOUT:
             # release hold
             self.ht_deactivate_hold(kc, keyboard, *args, **kwargs)
@@ -0,0 +1,185 @@
+'''
+Optional main loop profiler.
+
+Times each phase of the main loop, every module and extension hook that is
+dispatched to, and each module's `process_key`, and keeps a fixed-size
+histogram per timer. Enable it with `keyboard.profiler = Profiler()`; the
+keyboard is instrumented on boot by wrapping the timed methods, so nothing is
+measured (or paid for) when no profiler is set.
+Results are printed through `Debug` by `report()`, the `PROF_DUMP` key, or
+every `report_period_ms` if set.
+'''
+
+from micropython import const
+
+from kmk.keys import make_key
+from kmk.kmktime import ticks_diff
+from kmk.scheduler import create_task
+from kmk.utils import Debug
+
+try:
+    from time import monotonic_ns
+
+    def _now() -> int:
+        return monotonic_ns()
+
+    def _elapsed_us(start: int) -> int:
+        return (monotonic_ns() - start) // 1000
+
+except ImportError:
+    from supervisor import ticks_ms
+
+    def _now() -> int:
+        return ticks_ms()
+
+    def _elapsed_us(start: int) -> int:
+        return ticks_diff(ticks_ms(), start) * 1000
+
+
+debug = Debug(__name__)
+
+# Bucket `i` counts durations in [2**i, 2**(i+1)) us, the last one everything
+# above, i.e. the histogram covers 1us to ~2s.
+_BUCKETS = const(22)
+
+_PHASES = (
+    ('_main_loop', 'loop'),
+    ('_scan_matrix', 'scan'),
+    ('_handle_matrix_updates', 'matrix'),
+    ('_process_resume_buffer', 'resume'),
+    ('_process_timeouts', 'timeouts'),
+    ('_send_hid', 'hid'),
+    ('idle_sleep', 'idle'),
+)
+
+_HOOKS = (
+    ('_before_matrix_scan_hooks', 'before_matrix_scan'),
+    ('_after_matrix_scan_hooks', 'after_matrix_scan'),
+    ('_before_hid_send_hooks', 'before_hid_send'),
+    ('_after_hid_send_hooks', 'after_hid_send'),
+    ('_powersave_enable_hooks', 'on_powersave_enable'),
+    ('_powersave_disable_hooks', 'on_powersave_disable'),
+)
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * _BUCKETS
+        self.count = 0
+        self.max = 0
+
+    def add(self, us: int) -> None:
+        if us > self.max:
+            self.max = us
+        self.count += 1
+        idx = 0
+        while us > 1 and idx < _BUCKETS - 1:
+            us >>= 1
+            idx += 1
+        self.buckets[idx] += 1
+
+    def percentile(self, p: int) -> int:
+        '''Upper bound in us of the bucket containing the `p`th percentile.'''
+        threshold = (self.count * p + 99) // 100
+        seen = 0
+        for idx, count in enumerate(self.buckets):
+            seen += count
+            if seen >= threshold:
+                return min(1 << (idx + 1), self.max)
+        return self.max
+
+    def reset(self) -> None:
+        for idx in range(_BUCKETS):
+            self.buckets[idx] = 0
+        self.count = 0
+        self.max = 0
+
+
+class Profiler:
+    def __init__(self, report_period_ms: int = 0):
+        self.report_period_ms = report_period_ms
+        self._timers = []
+        self._histograms = {}
+        self._keyboard = None
+        self._modules = []
+
+        make_key(names=('PROF_DUMP',), on_press=lambda *args: self.report())
+        make_key(names=('PROF_RESET',), on_press=lambda *args: self.reset())
+
+    def instrument(self, keyboard) -> None:
+        '''
+        Wrap the main loop phases, the compiled hook tables and the modules'
+        `process_key`. Called by the keyboard whenever its hooks are compiled.
+        '''
+        if self._keyboard is not keyboard:
+            self._keyboard = keyboard
+            for attr, name in _PHASES:
+                setattr(keyboard, attr, self.timed(name, getattr(keyboard, attr)))
+            if self.report_period_ms:
+                create_task(self.report, period_ms=self.report_period_ms)
+
+        for attr, hook_name in _HOOKS:
+            hooks = getattr(keyboard, attr)
+            setattr(
+                keyboard,
+                attr,
+                tuple(
+                    (obj, self.timed(_label(obj, hook_name), hook), arg)
+                    for obj, hook, arg in hooks
+                ),
+            )
+
+        for module, _, _, _ in keyboard._key_routes:
+            if module in self._modules:
+                continue
+            self._modules.append(module)
+            module.process_key = self.timed(
+                _label(module, 'process_key'), module.process_key
+            )
+
+    def timed(self, name: str, func):
+        '''Return `func` wrapped to record its durations under `name`.'''
+        try:
+            hist = self._histograms[name]
+        except KeyError:
+            hist = self._histograms[name] = Histogram()
+            self._timers.append(name)
+
+        def _timed(*args, **kwargs):
+            start = _now()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                hist.add(_elapsed_us(start))
+
+        return _timed
+
+    def report(self) -> None:
+        if not debug.enabled:
+            return
+        for name in self._timers:
+            hist = self._histograms[name]
+            if not hist.count:
+                continue
+            debug(
+                name,
+                ': n=',
+                hist.count,
+                ' p50=',
+                hist.percentile(50),
+                'us p99=',
+                hist.percentile(99),
+                'us max=',
+                hist.max,
+                'us',
+            )
+            # A report can be longer than the debug buffer.
+            Debug.flush(force=True)
+
+    def reset(self) -> None:
+        for hist in self._histograms.values():
+            hist.reset()
+
+
+def _label(obj, name: str) -> str:
+    return obj.__class__.__name__ + '.' + name
@@ -0,0 +1,117 @@
+class RingBuffer:
+    '''
+    Fixed-capacity double-ended queue of preallocated, reusable slots.
+
+    `push` and `push_front` return a free slot for the caller to fill in, or
+    `None` if the buffer is full, which is counted in `overflows`; the caller
+    has to make room or handle the entry otherwise. `pop` and `pop_back`
+    return a slot that is only valid until the next push; copy what you need
+    out of it before that.
+
+    :param size: The capacity of the buffer.
+    :param factory: Called once per slot to preallocate the slot objects.
+    '''
+
+    def __init__(self, size: int, factory) -> None:
+        self.size = size
+        self.overflows = 0
+        self._factory = factory
+        self._slots = [factory() for _ in range(size)]
+        self._head = 0
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    def __getitem__(self, idx: int):
+        '''The entry at `idx`, counted from the oldest one.'''
+        if not 0 <= idx < self._len:
+            raise IndexError(idx)
+        idx += self._head
+        if idx >= self.size:
+            idx -= self.size
+        return self._slots[idx]
+
+    def remove(self, idx: int) -> None:
+        '''
+        Remove the entry at `idx`, counted from the oldest one. The newer entries
+        move up, by moving their slots, not their contents.
+        '''
+        if not 0 <= idx < self._len:
+            raise IndexError(idx)
+        slots = self._slots
+        size = self.size
+        pos = self._head + idx
+        if pos >= size:
+            pos -= size
+        removed = slots[pos]
+        for _ in range(idx + 1, self._len):
+            nxt = pos + 1
+            if nxt >= size:
+                nxt -= size
+            slots[pos] = slots[nxt]
+            pos = nxt
+        slots[pos] = removed
+        self._len -= 1
+
+    def grow(self, size: int) -> None:
+        '''
+        Enlarge the buffer to `size` slots, keeping its entries and their
+        order. This allocates, and is meant for overflows only.
+        '''
+        slots = self._slots
+        head = self._head
+        self._slots = slots[head:] + slots[:head]
+        self._slots.extend(self._factory() for _ in range(size - self.size))
+        self._head = 0
+        self.size = size
+
+    def clear(self) -> None:
+        self._head = 0
+        self._len = 0
+
+    def push(self):
+        if self._len >= self.size:
+            self.overflows += 1
+            return None
+
+        idx = self._head + self._len
+        if idx >= self.size:
+            idx -= self.size
+        self._len += 1
+        return self._slots[idx]
+
+    def push_front(self):
+        if self._len >= self.size:
+            self.overflows += 1
+            return None
+
+        self._head -= 1
+        if self._head < 0:
+            self._head += self.size
+        self._len += 1
+        return self._slots[self._head]
+
+    def pop(self):
+        if not self._len:
+            return None
+
+        slot = self._slots[self._head]
+        self._head += 1
+        if self._head >= self.size:
+            self._head -= self.size
+        self._len -= 1
+        return slot
+
+    def pop_back(self):
+        if not self._len:
+            return None
+
+        self._len -= 1
+        idx = self._head + self._len
+        if idx >= self.size:
+            idx -= self.size
+        return self._slots[idx]
@@ -36,3 +36,10 @@ class Scanner:
         The key report is a byte array with contents [row, col, True if pressed else False]
         '''
         raise NotImplementedError
+
+    def events_pending(self):
+        '''
+        Whether events are waiting to be picked up by `scan_for_changes`.
+        Scanners that only detect changes while scanning return `None`.
+        '''
+        return None
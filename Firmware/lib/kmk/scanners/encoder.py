@@ -41,3 +41,8 @@ class RotaryioEncoder(Scanner):
             self._pressed = True
 
         return keypad.Event(key_number, self._pressed)
+
+    def events_pending(self):
+        return (
+            self._pressed or bool(self._queue) or self.encoder.position != self.position
+        )
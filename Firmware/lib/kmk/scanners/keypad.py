@@ -23,9 +23,12 @@ class KeypadScanner(Scanner):
         '''
         ev = self.keypad.events.get()
         if ev and self.offset:
-            return keypad.Event(ev.key_number + self.offset, ev.pressed)
+            return keypad.Event(ev.key_number + self.offset, ev.pressed, ev.timestamp)
         return ev
 
+    def events_pending(self):
+        return bool(self.keypad.events)
+
 
 class MatrixScanner(KeypadScanner):
     '''
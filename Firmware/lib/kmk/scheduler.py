@@ -69,6 +69,14 @@ def get_due_task() -> [Callable, None]:
         yield t.coro
 
 
+def get_next_deadline() -> [int, None]:
+    '''Milliseconds until the next task is due, `None` if there is none.'''
+    t = _task_queue.peek()
+    if not t:
+        return None
+    return max(0, ticks_diff(t.ph_key, ticks_ms()))
+
+
 def cancel_task(t: [Task, PeriodicTaskMeta]) -> None:
     if isinstance(t, PeriodicTaskMeta):
         t = t._task
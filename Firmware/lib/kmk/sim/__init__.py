@@ -0,0 +1,24 @@
+'''
+Host-side simulation of a KMK keyboard.
+
+Runs `KMKKeyboard` under CPython with stand-ins for the CircuitPython modules
+it needs and a virtual millisecond clock, so configs, modules and timing can be
+exercised deterministically off the device:
+
+    from kmk.sim import Simulator
+
+    sim = Simulator.from_config('code.py').boot()
+    sim.tap(4)
+    print(sim.reports)
+
+This package is for the host only and doesn't need to be copied to the board.
+'''
+
+from kmk.sim.hardware import install
+
+install()
+
+from kmk.sim.clock import clock  # noqa: E402
+from kmk.sim.harness import Simulator  # noqa: E402
+
+__all__ = ('Simulator', 'clock', 'install')
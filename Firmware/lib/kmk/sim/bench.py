@@ -0,0 +1,439 @@
+'''
+Benchmarks for the keyboard's hot paths, run on the host with `kmk.sim`.
+
+    python -m kmk.sim.bench [--config code.py] [--output results.json]
+                            [--compare baseline.json] [-k filter]
+
+Every benchmark reports the events it processed per second and two allocation
+figures measured with `tracemalloc` in a separate pass:
+* `peak_bytes_per_event`: transient heap growth while handling an event, i.e.
+  garbage the device's GC will have to collect,
+* `retained_blocks_per_event`: blocks still allocated afterwards, i.e. leaks.
+Absolute numbers are CPython's; what matters is how they change between KMK
+versions. `--compare` flags benchmarks that got slower or allocate more than a
+previous run's `--output`, and exits with status 1 if any did.
+'''
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+from contextlib import redirect_stdout
+from time import perf_counter
+
+from kmk.sim import Simulator, clock
+
+# The ocreeb-12 config, `Firmware/code.py`.
+_DEFAULT_CONFIG = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'code.py')
+
+_BENCHMARKS = []
+
+
+def benchmark(name: str, *variants: dict):
+    '''
+    Register a benchmark, once per dict of keyword arguments in `variants`.
+    The decorated function sets up its state and returns `(step, events)`;
+    every call to `step()` processes `events` events.
+    '''
+
+    def register(func):
+        for params in variants or ({},):
+            _BENCHMARKS.append((name, params, func))
+        return func
+
+    return register
+
+
+def _keyboard(keymap, modules=(), extensions=(), rows=8):
+    import board
+
+    from kmk.kmk_keyboard import KMKKeyboard
+    from kmk.scanners import DiodeOrientation
+
+    keyboard = KMKKeyboard()
+    cols = len(keymap[0]) // rows
+    keyboard.row_pins = tuple(getattr(board, f'R{r}') for r in range(rows))
+    keyboard.col_pins = tuple(getattr(board, f'C{c}') for c in range(cols))
+    keyboard.diode_orientation = DiodeOrientation.COL2ROW
+    keyboard.keymap = keymap
+    keyboard.modules = list(modules)
+    keyboard.extensions = list(extensions)
+    return keyboard
+
+
+def _letters(count=64):
+    from kmk.keys import KC
+
+    keys = [KC[c] for c in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890']
+    keys += [KC[f'F{n}'] for n in range(1, 25)]
+    keys += [KC.LEFT, KC.RIGHT, KC.UP, KC.DOWN]
+    return keys[:count]
+
+
+def _config_sim(config):
+    return Simulator.from_config(config).boot()
+
+
+def _tap_script(sim, coords):
+    def step():
+        for coord in coords:
+            sim.press(coord, 1)
+            sim.release(coord, 1)
+        sim.reports.clear()
+
+    return step, 2 * len(coords)
+
+
+# Keymap lookups
+
+
+@benchmark('find_key_in_map', {'cached': True}, {'cached': False})
+def bench_find_key_in_map(config, cached):
+    from kmk.keys import KC
+
+    keys = _letters()
+    keymap = [keys] + [[KC.TRNS] * (len(keys) - 1) + [KC.B] for _ in range(3)]
+    keyboard = _keyboard(keymap)
+    Simulator(keyboard).boot()
+    keyboard.active_layers = [3, 2, 1, 0]
+    find_key_in_map = keyboard._find_key_in_map
+    invalidate = keyboard.invalidate_keymap_cache
+    coords = range(len(keys))
+
+    if cached:
+
+        def step():
+            for coord in coords:
+                find_key_in_map(coord)
+
+    else:
+
+        def step():
+            for coord in coords:
+                invalidate()
+                find_key_in_map(coord)
+
+    return step, len(coords)
+
+
+# Key processing with the module stack of `code.py`
+
+
+@benchmark('pre_process_key')
+def bench_pre_process_key(config):
+    sim = _config_sim(config)
+    keyboard = sim.keyboard
+    # F2, LEFT, SPACE, RIGHT, MUTE on the default layer: plain keys, a consumer
+    # key, all of them go through every module.
+    coords = (4, 9, 10, 11, 6)
+    keys = [keyboard._find_key_in_map(coord) for coord in coords]
+    events = tuple(zip(keys, coords))
+    pre_process_key = keyboard.pre_process_key
+
+    def step():
+        for key, coord in events:
+            pre_process_key(key, True, coord)
+        for key, coord in events:
+            pre_process_key(key, False, coord)
+
+    return step, 2 * len(events)
+
+
+@benchmark('main_loop_tap')
+def bench_main_loop_tap(config):
+    sim = _config_sim(config)
+    return _tap_script(sim, (4, 9, 10, 11, 6))
+
+
+@benchmark('main_loop_idle')
+def bench_main_loop_idle(config):
+    sim = _config_sim(config)
+    main_loop = sim.keyboard._main_loop
+
+    def step():
+        main_loop()
+        clock.advance(1)
+
+    return step, 1
+
+
+# HID reports
+
+
+@benchmark('hid_create_report_send')
+def bench_hid(config):
+    from kmk.keys import KC
+
+    sim = _config_sim(config)
+    hid = sim.keyboard._hid_helper
+    sys.modules['usb_hid'].report_sink = None
+    pressed = {KC.A, KC.B, KC.LSFT, KC.LCTL, KC.MUTE, KC.MB_LMB}
+    released = set()
+
+    def step():
+        hid.create_report(pressed)
+        hid.send()
+        hid.create_report(released)
+        hid.send()
+
+    return step, 2
+
+
+@benchmark('hid_delta_send', {'held': 0}, {'held': 5})
+def bench_hid_delta(config, held):
+    from kmk.keys import KC
+
+    sim = _config_sim(config)
+    keyboard = sim.keyboard
+    sys.modules['usb_hid'].report_sink = None
+    keys_pressed = keyboard.keys_pressed
+    for key in _letters(held):
+        keys_pressed.add(key)
+    keyboard._send_hid()
+
+    def step():
+        keys_pressed.add(KC.Z)
+        keyboard._send_hid()
+        keys_pressed.discard(KC.Z)
+        keyboard._send_hid()
+
+    return step, 2
+
+
+# Combos
+
+
+@benchmark('combos', {'count': 10}, {'count': 100}, {'count': 500})
+def bench_combos(config, count):
+    from kmk.keys import KC
+    from kmk.modules.combos import Chord, Combos
+
+    keys = _letters()
+    rng = random.Random(count)
+    pairs = set()
+    while len(pairs) < count:
+        pair = tuple(sorted(rng.sample(range(len(keys)), 2)))
+        pairs.add(pair)
+    combos = Combos([Chord((keys[a], keys[b]), KC.ESC) for a, b in sorted(pairs)])
+    sim = Simulator(_keyboard([keys], modules=[combos])).boot()
+
+    a, b = sorted(pairs)[0]
+    singles = tuple(rng.sample(range(len(keys)), 4))
+
+    def step():
+        # A matching chord, then plain taps that have to time out of every
+        # potential match.
+        sim.press(a)
+        sim.press(b, 1)
+        sim.release(a)
+        sim.release(b, 1)
+        for coord in singles:
+            sim.press(coord, 60)
+            sim.release(coord, 60)
+        sim.reports.clear()
+
+    return step, 4 + 2 * len(singles)
+
+
+# String substitution
+
+
+@benchmark('string_substitution', {'words': 50}, {'words': 500})
+def bench_string_substitution(config, words):
+    from kmk.modules.string_substitution import StringSubstitution
+
+    rng = random.Random(words)
+    alphabet = 'abcdefghijklmnopqrstuvwxyz'
+    dictionary = {}
+    while len(dictionary) < words:
+        word = ''.join(rng.choice(alphabet) for _ in range(rng.randint(3, 8)))
+        dictionary[word] = word.upper()
+    # The rules are a class attribute: start from a clean slate.
+    StringSubstitution._rules = []
+    substitution = StringSubstitution(dictionary)
+
+    keys = _letters()
+    sim = Simulator(_keyboard([keys], modules=[substitution])).boot()
+
+    # Type a word that doesn't match anything, so only the matching is timed.
+    text = 'zqxjkvbp'
+    coords = tuple(alphabet.index(c) for c in text)
+    return _tap_script(sim, coords)
+
+
+# RGB
+
+
+@benchmark(
+    'rgb_animate',
+    {'mode': 'RAINBOW', 'pixels': 4},
+    {'mode': 'BREATHING', 'pixels': 64},
+    {'mode': 'KNIGHT', 'pixels': 64},
+    {'mode': 'SWIRL', 'pixels': 64},
+)
+def bench_rgb_animate(config, mode, pixels):
+    import board
+
+    from kmk.extensions.rgb import RGB, AnimationModes
+
+    rgb = RGB(
+        pixel_pin=board.LED,
+        num_pixels=pixels,
+        animation_mode=getattr(AnimationModes, mode),
+        val_default=64,
+    )
+    Simulator(_keyboard([_letters()], extensions=[rgb])).boot()
+    rgb.enable = True
+    animate = rgb.animate
+
+    def step():
+        animate()
+        clock.advance(16)
+
+    return step, 1
+
+
+def _measure_time(step, events, min_time):
+    step()
+    iterations = 0
+    start = perf_counter()
+    elapsed = 0
+    while elapsed < min_time:
+        step()
+        iterations += 1
+        elapsed = perf_counter() - start
+    return iterations * events, elapsed
+
+
+def _measure_memory(step, events, iterations=20):
+    gc.collect()
+    step()
+    tracemalloc.start()
+    try:
+        peak = 0
+        blocks = sys.getallocatedblocks()
+        for _ in range(iterations):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            step()
+            _, step_peak = tracemalloc.get_traced_memory()
+            peak += step_peak - before
+        gc.collect()
+        retained = sys.getallocatedblocks() - blocks
+    finally:
+        tracemalloc.stop()
+    total = iterations * events
+    return peak / total, max(retained, 0) / total
+
+
+def run(config=_DEFAULT_CONFIG, select=None, min_time=0.5, memory=True):
+    '''Run the registered benchmarks and return their results.'''
+    results = []
+    for name, params, func in _BENCHMARKS:
+        label = _label(name, params)
+        if select and select not in label:
+            continue
+
+        step, events = func(config, **params)
+        count, elapsed = _measure_time(step, events, min_time)
+        result = {
+            'name': name,
+            'params': params,
+            'events': count,
+            'seconds': round(elapsed, 6),
+            'events_per_s': round(count / elapsed, 1),
+            'us_per_event': round(elapsed * 1e6 / count, 3),
+        }
+        if memory:
+            peak, retained = _measure_memory(step, events)
+            result['peak_bytes_per_event'] = round(peak, 1)
+            result['retained_blocks_per_event'] = round(retained, 3)
+        results.append(result)
+        print(_format(result), file=sys.stderr)
+    return results
+
+
+def _label(name, params):
+    if not params:
+        return name
+    return name + '[' + ','.join(f'{k}={v}' for k, v in params.items()) + ']'
+
+
+def _format(result):
+    line = (
+        f"{_label(result['name'], result['params']):<40}"
+        f"{result['events_per_s']:>12.0f} ev/s"
+        f"{result['us_per_event']:>10.2f} us"
+    )
+    if 'peak_bytes_per_event' in result:
+        line += f"{result['peak_bytes_per_event']:>10.0f} B/ev"
+    return line
+
+
+def compare(results, baseline, threshold=10.0):
+    '''
+    Compare against a baseline and return the labels of benchmarks that got
+    more than `threshold` percent slower or allocate more.
+    '''
+    previous = {_label(r['name'], r['params']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        label = _label(result['name'], result['params'])
+        old = previous.get(label)
+        if old is None:
+            continue
+        change = (result['us_per_event'] / old['us_per_event'] - 1) * 100
+        regressed = change > threshold
+        if 'peak_bytes_per_event' in result and 'peak_bytes_per_event' in old:
+            if result['peak_bytes_per_event'] > old['peak_bytes_per_event'] * (
+                1 + threshold / 100
+            ):
+                regressed = True
+        if regressed:
+            regressions.append(label)
+        print(
+            f'{label:<40}{change:>+8.1f}%' + ('  REGRESSION' if regressed else ''),
+            file=sys.stderr,
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m kmk.sim.bench')
+    parser.add_argument('--config', default=_DEFAULT_CONFIG)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of a previous run')
+    parser.add_argument('--threshold', type=float, default=10.0)
+    parser.add_argument('--min-time', type=float, default=0.5)
+    parser.add_argument('--no-memory', action='store_true')
+    parser.add_argument('-k', dest='select', help='only run matching benchmarks')
+    args = parser.parse_args(argv)
+
+    # Keep configs and debug output from mixing with the results.
+    with redirect_stdout(sys.stderr):
+        results = run(args.config, args.select, args.min_time, not args.no_memory)
+    document = {
+        'python': sys.version.split()[0],
+        'implementation': sys.implementation.name,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,30 @@
+_TICKS_PERIOD = 1 << 29
+
+
+class VirtualClock:
+    '''
+    Millisecond clock that only moves when told to. `ticks_ms` wraps like
+    `supervisor.ticks_ms` does on the device.
+    '''
+
+    def __init__(self, start_ms: int = 0):
+        self.now = start_ms
+
+    def ticks_ms(self) -> int:
+        return self.now % _TICKS_PERIOD
+
+    def monotonic_ns(self) -> int:
+        return self.now * 1_000_000
+
+    def monotonic(self) -> float:
+        return self.now / 1000
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(int(round(seconds * 1000)))
+
+    def advance(self, ms: int) -> None:
+        if ms > 0:
+            self.now += ms
+
+
+clock = VirtualClock()
@@ -0,0 +1,715 @@
+'''
+Stand-ins for the CircuitPython modules KMK depends on, backed by the virtual
+clock. `install()` registers them in `sys.modules`; it has to run before any
+other `kmk` module is imported.
+'''
+
+import gc
+import heapq
+import importlib.machinery
+import importlib.util
+import os
+import sys
+import time
+from types import ModuleType
+
+from kmk.sim.clock import clock
+
+
+def _module(name, **attrs):
+    module = ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+# supervisor
+
+
+class _Runtime:
+    usb_connected = True
+    serial_connected = False
+
+
+class _Supervisor:
+    reload_requested = False
+
+    @staticmethod
+    def reload():
+        _Supervisor.reload_requested = True
+
+
+def _supervisor():
+    return _module(
+        'supervisor',
+        ticks_ms=clock.ticks_ms,
+        runtime=_Runtime(),
+        reload=_Supervisor.reload,
+        set_next_stack_limit=lambda limit: None,
+    )
+
+
+# micropython
+
+
+def _micropython():
+    return _module(
+        'micropython',
+        const=lambda x: x,
+        native=lambda f: f,
+        viper=lambda f: f,
+    )
+
+
+# _asyncio
+
+
+class Task:
+    '''The subset of `_asyncio.Task` the KMK scheduler relies on.'''
+
+    def __init__(self, coro, globals=None):
+        self.coro = coro
+        self.data = None
+        self.ph_key = 0
+        self._entry = None
+
+
+class TaskQueue:
+    '''
+    A binary heap with the interface of the native `_asyncio.TaskQueue`.
+    Keys are `ticks_ms` values; they're ordered by their virtual time, so
+    wrapping ticks sort correctly.
+    '''
+
+    def __init__(self):
+        self._heap = []
+        self._seq = 0
+
+    def _prune(self):
+        heap = self._heap
+        while heap and heap[0][2] is None:
+            heapq.heappop(heap)
+
+    def peek(self):
+        self._prune()
+        return self._heap[0][2] if self._heap else None
+
+    def push(self, v, key=None):
+        now = clock.ticks_ms()
+        if key is None:
+            key = now
+        if v._entry is not None:
+            self.remove(v)
+        diff = (key - now) % (1 << 29)
+        if diff >= 1 << 28:
+            diff -= 1 << 29
+        self._seq += 1
+        v.ph_key = key
+        v._entry = [clock.now + diff, self._seq, v]
+        heapq.heappush(self._heap, v._entry)
+
+    def pop(self):
+        self._prune()
+        v = heapq.heappop(self._heap)[2]
+        v._entry = None
+        return v
+
+    def remove(self, v):
+        if v._entry is not None:
+            v._entry[2] = None
+            v._entry = None
+
+
+def _asyncio():
+    return _module('_asyncio', Task=Task, TaskQueue=TaskQueue)
+
+
+# usb_cdc
+
+
+class Serial:
+    '''A serial port stand-in; everything written to it is kept in `written`.'''
+
+    def __init__(self, connected=False):
+        self.connected = connected
+        self.out_waiting = 0
+        self.in_waiting = 0
+        self.timeout = 0
+        self.write_timeout = None
+        self.written = bytearray()
+
+    def write(self, data):
+        self.written.extend(data)
+        return len(data)
+
+    def read(self, size=1):
+        return b''
+
+    def readline(self, size=-1):
+        return b''
+
+    def reset_input_buffer(self):
+        pass
+
+    def reset_output_buffer(self):
+        pass
+
+    def flush(self):
+        pass
+
+
+def _usb_cdc():
+    return _module(
+        'usb_cdc',
+        console=Serial(),
+        data=Serial(connected=True),
+        enable=lambda **kwargs: None,
+        disable=lambda: None,
+    )
+
+
+# usb_hid
+
+
+class Device:
+    '''
+    A HID device stand-in. Sent reports are passed to `usb_hid.report_sink`,
+    if set. Reports of the wrong length raise `ValueError`, just like on the
+    device, which KMK relies on to autodetect report formats.
+    '''
+
+    KEYBOARD = None
+    MOUSE = None
+    CONSUMER_CONTROL = None
+
+    def __init__(
+        self,
+        *,
+        name='device',
+        usage_page=0x01,
+        usage=0x00,
+        report_ids=(0,),
+        in_report_lengths=(0,),
+        out_report_lengths=(0,),
+        **kwargs,
+    ):
+        self.name = name
+        self.usage_page = usage_page
+        self.usage = usage
+        self.report_ids = report_ids
+        self.in_report_lengths = in_report_lengths
+        self.out_report_lengths = out_report_lengths
+        self.last_received_report = None
+
+    def send_report(self, report, report_id=None):
+        if report_id is None:
+            length = self.in_report_lengths[0]
+        else:
+            length = self.in_report_lengths[self.report_ids.index(report_id)]
+        if length and len(report) != length:
+            raise ValueError(f'Buffer incorrect size. Should be {length} bytes.')
+        sink = sys.modules['usb_hid'].report_sink
+        if sink is not None:
+            sink(self, bytes(report))
+
+    def get_last_received_report(self, report_id=None):
+        report = self.last_received_report
+        self.last_received_report = None
+        return report
+
+
+Device.KEYBOARD = Device(
+    name='keyboard',
+    usage_page=0x01,
+    usage=0x06,
+    report_ids=(1,),
+    in_report_lengths=(8,),
+    out_report_lengths=(1,),
+)
+Device.MOUSE = Device(
+    name='mouse',
+    usage_page=0x01,
+    usage=0x02,
+    report_ids=(2,),
+    in_report_lengths=(4,),
+)
+Device.CONSUMER_CONTROL = Device(
+    name='consumer',
+    usage_page=0x0C,
+    usage=0x01,
+    report_ids=(3,),
+    in_report_lengths=(2,),
+)
+
+
+def _usb_hid():
+    module = _module(
+        'usb_hid',
+        Device=Device,
+        devices=[Device.KEYBOARD, Device.MOUSE, Device.CONSUMER_CONTROL],
+        report_sink=None,
+        disable=lambda: None,
+    )
+
+    def enable(devices, boot_device=0):
+        module.devices = list(devices)
+
+    module.enable = enable
+    return module
+
+
+# board, digitalio
+
+
+class Pin:
+    '''A GPIO pin. Set `level` to drive it from the outside.'''
+
+    def __init__(self, name):
+        self.name = name
+        self.level = None
+
+    def __repr__(self):
+        return 'board.' + self.name
+
+
+def _board():
+    module = _module('board')
+    pins = {}
+
+    def __getattr__(name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        try:
+            return pins[name]
+        except KeyError:
+            pin = pins[name] = Pin(name)
+            return pin
+
+    module.__getattr__ = __getattr__
+    module.I2C = lambda: _I2C()
+    module.SPI = lambda: None
+    return module
+
+
+class Direction:
+    INPUT = 'INPUT'
+    OUTPUT = 'OUTPUT'
+
+
+class Pull:
+    UP = 'UP'
+    DOWN = 'DOWN'
+
+
+class DriveMode:
+    PUSH_PULL = 'PUSH_PULL'
+    OPEN_DRAIN = 'OPEN_DRAIN'
+
+
+class DigitalInOut:
+    def __init__(self, pin):
+        self.pin = pin
+        self.direction = Direction.INPUT
+        self.pull = None
+        self.drive_mode = DriveMode.PUSH_PULL
+        self._value = False
+
+    @property
+    def value(self):
+        if self.direction == Direction.OUTPUT:
+            return self._value
+        if self.pin is not None and self.pin.level is not None:
+            return self.pin.level
+        return self.pull == Pull.UP
+
+    @value.setter
+    def value(self, value):
+        self._value = bool(value)
+
+    def switch_to_input(self, pull=None):
+        self.direction = Direction.INPUT
+        self.pull = pull
+
+    def switch_to_output(self, value=False, drive_mode=DriveMode.PUSH_PULL):
+        self.direction = Direction.OUTPUT
+        self.drive_mode = drive_mode
+        self._value = value
+
+    def deinit(self):
+        pass
+
+
+def _digitalio():
+    return _module(
+        'digitalio',
+        DigitalInOut=DigitalInOut,
+        Direction=Direction,
+        Pull=Pull,
+        DriveMode=DriveMode,
+    )
+
+
+# busio
+
+
+class _I2C:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def try_lock(self):
+        return True
+
+    def unlock(self):
+        pass
+
+    def scan(self):
+        return []
+
+    def deinit(self):
+        pass
+
+
+def _busio():
+    return _module('busio', I2C=_I2C, SPI=_I2C, UART=_I2C)
+
+
+# keypad
+
+
+class Event:
+    def __init__(self, key_number=0, pressed=True, timestamp=None):
+        self.key_number = key_number
+        self.pressed = pressed
+        self.timestamp = clock.ticks_ms() if timestamp is None else timestamp
+
+    @property
+    def released(self):
+        return not self.pressed
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Event)
+            and self.key_number == other.key_number
+            and self.pressed == other.pressed
+        )
+
+    def __hash__(self):
+        return self.key_number << 1 | self.pressed
+
+    def __repr__(self):
+        state = 'pressed' if self.pressed else 'released'
+        return f'<Event: key_number {self.key_number} {state}>'
+
+
+class EventQueue:
+    def __init__(self, max_events=64):
+        self._events = []
+        self._max_events = max_events
+        self.overflowed = False
+
+    def get(self):
+        if self._events:
+            return self._events.pop(0)
+        return None
+
+    def get_into(self, event):
+        if not self._events:
+            return False
+        ev = self._events.pop(0)
+        event.key_number = ev.key_number
+        event.pressed = ev.pressed
+        event.timestamp = ev.timestamp
+        return True
+
+    def clear(self):
+        self._events.clear()
+        self.overflowed = False
+
+    def put(self, event):
+        '''Simulation only: queue an event as if it had been scanned.'''
+        if len(self._events) >= self._max_events:
+            self.overflowed = True
+            return
+        self._events.append(event)
+
+    def __len__(self):
+        return len(self._events)
+
+    def __bool__(self):
+        return bool(self._events)
+
+
+class _Keypad:
+    def __init__(self, key_count, max_events=64):
+        self.key_count = key_count
+        self.events = EventQueue(max_events)
+
+    def reset(self):
+        self.events.clear()
+
+    def deinit(self):
+        pass
+
+
+class KeyMatrix(_Keypad):
+    def __init__(
+        self, row_pins, column_pins, columns_to_anodes=True, max_events=64, **kwargs
+    ):
+        self.row_pins = row_pins
+        self.column_pins = column_pins
+        super().__init__(len(row_pins) * len(column_pins), max_events)
+
+
+class Keys(_Keypad):
+    def __init__(self, pins, *, value_when_pressed, max_events=64, **kwargs):
+        self.pins = pins
+        super().__init__(len(pins), max_events)
+
+
+class ShiftRegisterKeys(_Keypad):
+    def __init__(self, *, key_count, max_events=64, **kwargs):
+        if not isinstance(key_count, int):
+            key_count = sum(key_count)
+        super().__init__(key_count, max_events)
+
+
+def _keypad():
+    return _module(
+        'keypad',
+        Event=Event,
+        EventQueue=EventQueue,
+        KeyMatrix=KeyMatrix,
+        Keys=Keys,
+        ShiftRegisterKeys=ShiftRegisterKeys,
+    )
+
+
+# rotaryio
+
+
+class IncrementalEncoder:
+    '''Set `position` to turn the encoder.'''
+
+    def __init__(self, pin_a, pin_b, divisor=4):
+        self.pin_a = pin_a
+        self.pin_b = pin_b
+        self.divisor = divisor
+        self.position = 0
+
+    def deinit(self):
+        pass
+
+
+def _rotaryio():
+    return _module('rotaryio', IncrementalEncoder=IncrementalEncoder)
+
+
+# adafruit_pixelbuf, neopixel
+
+
+class PixelBuf:
+    '''Pixels are kept as `(r, g, b)` tuples; `shown` holds the last `show()`.'''
+
+    def __init__(self, size, *, byteorder='BGR', brightness=1.0, auto_write=False):
+        self._pixels = [(0, 0, 0)] * size
+        self.shown = list(self._pixels)
+        self.show_count = 0
+        self.byteorder = byteorder
+        self.brightness = brightness
+        self.auto_write = auto_write
+
+    def __len__(self):
+        return len(self._pixels)
+
+    def __getitem__(self, index):
+        return self._pixels[index]
+
+    def __setitem__(self, index, value):
+        self._pixels[index] = tuple(value)[:3]
+        if self.auto_write:
+            self.show()
+
+    def fill(self, color):
+        for idx in range(len(self._pixels)):
+            self._pixels[idx] = tuple(color)[:3]
+        if self.auto_write:
+            self.show()
+
+    def show(self):
+        self.shown = list(self._pixels)
+        self.show_count += 1
+
+    def deinit(self):
+        pass
+
+
+class NeoPixel(PixelBuf):
+    def __init__(self, pin, n, *, bpp=3, pixel_order=None, **kwargs):
+        self.pin = pin
+        super().__init__(n, **kwargs)
+
+
+def _adafruit_pixelbuf():
+    return _module('adafruit_pixelbuf', PixelBuf=PixelBuf)
+
+
+def _neopixel():
+    return _module(
+        'neopixel',
+        NeoPixel=NeoPixel,
+        GRB='GRB',
+        RGB='RGB',
+        GRBW='GRBW',
+        RGBW='RGBW',
+    )
+
+
+# storage, microcontroller
+
+
+def _storage():
+    return _module(
+        'storage',
+        getmount=lambda path: _module('mount', label='CIRCUITPY'),
+        disable_usb_drive=lambda: None,
+        enable_usb_drive=lambda: None,
+        remount=lambda *args, **kwargs: None,
+    )
+
+
+def _microcontroller():
+    return _module(
+        'microcontroller',
+        delay_us=lambda us: clock.advance(us // 1000),
+        reset=_Supervisor.reload,
+        cpu=_module('cpu', temperature=25.0, frequency=125_000_000, uid=b'sim'),
+        nvm=bytearray(256),
+    )
+
+
+class _CaseInsensitiveFinder:
+    '''
+    CIRCUITPY is a FAT filesystem, so module names are case-insensitive on the
+    device (i.e. `kmk.extensions.RGB` is `kmk/extensions/rgb.py`). Mirror that
+    for the `kmk` package.
+    '''
+
+    @staticmethod
+    def find_spec(fullname, path=None, target=None):
+        if not fullname.startswith('kmk.') or not path:
+            return None
+        name = fullname.rpartition('.')[2].lower()
+        for directory in path:
+            try:
+                entries = os.listdir(directory)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.lower() == name + '.py':
+                    location = os.path.join(directory, entry)
+                    return importlib.util.spec_from_file_location(fullname, location)
+                if entry.lower() == name and os.path.isfile(
+                    os.path.join(directory, entry, '__init__.py')
+                ):
+                    location = os.path.join(directory, entry, '__init__.py')
+                    return importlib.util.spec_from_file_location(
+                        fullname,
+                        location,
+                        submodule_search_locations=[os.path.join(directory, entry)],
+                    )
+        return None
+
+
+_FACTORIES = {
+    'supervisor': _supervisor,
+    'micropython': _micropython,
+    '_asyncio': _asyncio,
+    'usb_cdc': _usb_cdc,
+    'usb_hid': _usb_hid,
+    'board': _board,
+    'digitalio': _digitalio,
+    'busio': _busio,
+    'keypad': _keypad,
+    'rotaryio': _rotaryio,
+    'adafruit_pixelbuf': _adafruit_pixelbuf,
+    'neopixel': _neopixel,
+    'storage': _storage,
+    'microcontroller': _microcontroller,
+}
+
+_installed = False
+_TIME_NAMES = ('sleep', 'monotonic', 'monotonic_ns')
+_time_originals = {name: getattr(time, name) for name in _TIME_NAMES}
+_time_patches = 0
+
+
+def install() -> None:
+    '''
+    Register the stand-in modules. Idempotent. The clock is only patched in by
+    `patch_time`, while a simulator is running.
+    '''
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    for name, factory in _FACTORIES.items():
+        sys.modules[name] = factory()
+
+    if not hasattr(gc, 'mem_free'):
+        gc.mem_free = lambda: 0
+        gc.mem_alloc = lambda: 0
+
+    if _CaseInsensitiveFinder not in sys.meta_path:
+        sys.meta_path.append(_CaseInsensitiveFinder)
+
+
+def _rebind_time(virtual: bool) -> None:
+    for name in _TIME_NAMES:
+        real = _time_originals[name]
+        fake = getattr(clock, name)
+        old, new = (real, fake) if virtual else (fake, real)
+        setattr(time, name, new)
+        # Modules that did `from time import sleep` hold their own reference.
+        for module_name, module in list(sys.modules.items()):
+            if (
+                module is not None
+                and module_name.startswith('kmk.')
+                and getattr(module, name, None) == old
+            ):
+                setattr(module, name, new)
+
+
+def patch_time():
+    '''
+    Route `time.sleep` and `time.monotonic*`, also where `kmk` modules imported
+    them by name, through the virtual clock. Returns a function that undoes it;
+    nested patches are undone by the last one.
+    '''
+    global _time_patches
+    if not _time_patches:
+        _rebind_time(True)
+    _time_patches += 1
+    restored = False
+
+    def restore() -> None:
+        global _time_patches
+        nonlocal restored
+        if restored:
+            return
+        restored = True
+        _time_patches -= 1
+        if not _time_patches:
+            _rebind_time(False)
+
+    return restore
+
+
+def reset() -> None:
+    '''Fresh USB state for a new simulated keyboard.'''
+    usb_hid = sys.modules['usb_hid']
+    usb_hid.devices = [Device.KEYBOARD, Device.MOUSE, Device.CONSUMER_CONTROL]
+    usb_hid.report_sink = None
+    sys.modules['usb_cdc'].data = Serial(connected=True)
+    _Supervisor.reload_requested = False
+    for device in (Device.KEYBOARD, Device.MOUSE, Device.CONSUMER_CONTROL):
+        device.last_received_report = None
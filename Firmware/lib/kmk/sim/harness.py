@@ -0,0 +1,223 @@
+try:
+    from typing import Callable, Optional
+except ImportError:
+    pass
+
+import sys
+from contextlib import redirect_stdout
+
+from kmk.sim.clock import clock
+from kmk.sim.hardware import install, patch_time, reset
+
+install()
+
+from kmk.hid import HIDModes  # noqa: E402
+from kmk.scheduler import get_next_deadline  # noqa: E402
+from kmk.utils import Debug  # noqa: E402
+
+# Gray code sequences of a GPIO encoder turning one detent, starting from and
+# returning to the detent at rest.
+_GRAY_CW = ((True, False), (True, True), (False, True), (False, False))
+_GRAY_CCW = ((False, True), (True, True), (True, False), (False, False))
+
+
+class Simulator:
+    '''
+    Runs a `KMKKeyboard` on the host: key events are injected into the keypad
+    scanners, the main loop is driven on the virtual clock, and every HID report
+    that's sent is recorded in `reports` as `(ticks, device name, bytes)`.
+
+    Time only passes when the simulator advances it: each busy main loop
+    iteration takes `cycle_ms`, and an idle keyboard jumps straight to the next
+    scheduled task. `time.sleep` and `time.monotonic*` follow the virtual clock
+    from `boot()` until `close()`; use the simulator as a context manager to
+    have it closed.
+    '''
+
+    def __init__(self, keyboard, cycle_ms: int = 1):
+        self.keyboard = keyboard
+        self.cycle_ms = cycle_ms
+        self.reports = []
+        self.on_report = None  # type: Optional[Callable[[int, str, bytes], None]]
+        self._booted = False
+        self._restore_time = None
+
+    @classmethod
+    def from_config(cls, path: str, cycle_ms: int = 1) -> 'Simulator':
+        '''
+        Load a user config (i.e. `code.py`) without running `keyboard.go()`. The
+        config has to guard that call with `if __name__ == '__main__'`. What it
+        prints goes to stderr.
+        '''
+        reset()
+        namespace = {'__name__': '__sim__', '__file__': path}
+        with open(path) as f, redirect_stdout(sys.stderr):
+            exec(compile(f.read(), path, 'exec'), namespace)
+        sim = cls(namespace['keyboard'], cycle_ms)
+        sim.config = namespace
+        return sim
+
+    @property
+    def now(self) -> int:
+        return clock.now
+
+    def boot(self, debug: Optional[bool] = False) -> 'Simulator':
+        '''
+        Initialize the keyboard like `go()` does. `debug` overrides debug
+        output, `None` keeps what the config asked for. Boot messages go to
+        stderr.
+        '''
+        if debug is not None:
+            Debug('kmk.sim').enabled = debug
+        if self._restore_time is None:
+            self._restore_time = patch_time()
+        sys.modules['usb_hid'].report_sink = self._record
+        with redirect_stdout(sys.stderr):
+            self.keyboard._init(hid_type=HIDModes.USB)
+        self._booted = True
+        # Let the HID setup task run.
+        self.run(1)
+        self.reports.clear()
+        return self
+
+    def close(self) -> None:
+        '''Give `time` back its real clock.'''
+        if self._restore_time is not None:
+            self._restore_time()
+            self._restore_time = None
+
+    def __enter__(self) -> 'Simulator':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _record(self, device, report: bytes) -> None:
+        ticks = clock.ticks_ms()
+        self.reports.append((ticks, device.name, report))
+        if self.on_report is not None:
+            self.on_report(ticks, device.name, report)
+
+    def reports_for(self, name: str) -> list:
+        return [report for _, device, report in self.reports if device == name]
+
+    def step(self) -> None:
+        '''Run exactly one main loop iteration.'''
+        self.keyboard._main_loop()
+
+    def run(self, ms: int) -> None:
+        '''Run the main loop for `ms` milliseconds of virtual time.'''
+        if not self._booted:
+            self.boot()
+        keyboard = self.keyboard
+        end = clock.now + ms
+        while clock.now < end:
+            start = clock.now
+            keyboard._main_loop()
+            if clock.now != start:
+                # The loop slept on its own (`idle_sleep`, `power`, ...).
+                continue
+            if keyboard._is_idle() and not self._events_pending():
+                deadline = get_next_deadline()
+                if deadline is None:
+                    deadline = end - clock.now
+                clock.advance(max(min(deadline, end - clock.now), self.cycle_ms))
+            else:
+                clock.advance(self.cycle_ms)
+
+    def _events_pending(self) -> bool:
+        for matrix in self.keyboard.matrix:
+            if matrix.events_pending():
+                return True
+        return False
+
+    def _scanner(self, key_number: int):
+        for matrix in self.keyboard.matrix:
+            if matrix.offset <= key_number < matrix.offset + matrix.key_count:
+                return matrix
+        raise ValueError(f'no scanner for key number {key_number}')
+
+    def event(self, key_number: int, pressed: bool) -> None:
+        '''Queue a raw keypad event, as if the scanner had just picked it up.'''
+        import keypad
+
+        if not self._booted:
+            self.boot()
+        scanner = self._scanner(key_number)
+        scanner.keypad.events.put(
+            keypad.Event(key_number - scanner.offset, pressed, clock.ticks_ms())
+        )
+
+    def press(self, key_number: int, ms: int = 0) -> None:
+        self.event(key_number, True)
+        self.run(ms)
+
+    def release(self, key_number: int, ms: int = 0) -> None:
+        self.event(key_number, False)
+        self.run(ms)
+
+    def tap(self, key_number: int, hold_ms: int = 20, after_ms: int = 20) -> None:
+        self.press(key_number, hold_ms)
+        self.release(key_number, after_ms)
+
+    def turn(self, encoder: int, steps: int, step_ms: int = 2) -> None:
+        '''
+        Turn a GPIO encoder of the `EncoderHandler` module by `steps` detents,
+        clockwise for positive `steps`. Every gray code transition is held for
+        `step_ms`.
+        '''
+        if not self._booted:
+            self.boot()
+        enc = self._encoder_handler().encoders[encoder]
+        sequence = _GRAY_CW if steps > 0 else _GRAY_CCW
+        for _ in range(abs(steps)):
+            for a, b in sequence:
+                self._drive(enc.pin_a, a)
+                self._drive(enc.pin_b, b)
+                self.run(step_ms)
+
+    def push(self, encoder: int, hold_ms: int = 20, after_ms: int = 20) -> None:
+        '''Click the button of a GPIO encoder.'''
+        if not self._booted:
+            self.boot()
+        enc = self._encoder_handler().encoders[encoder]
+        self._drive(enc.pin_button, True)
+        self.run(hold_ms)
+        self._drive(enc.pin_button, False)
+        self.run(after_ms)
+
+    def _encoder_handler(self):
+        from kmk.modules.encoder import EncoderHandler
+
+        for module in self.keyboard.modules:
+            if isinstance(module, EncoderHandler):
+                return module
+        raise ValueError('no EncoderHandler module')
+
+    @staticmethod
+    def _drive(encoder_pin, active: bool) -> None:
+        # `EncoderPin.get_value` inverts pulled up inputs: drive them low to
+        # make them read as active.
+        import digitalio
+
+        io = encoder_pin.io
+        level = active if io.pull != digitalio.Pull.UP else not active
+        io.pin.level = level
+
+    def replay(self, script) -> None:
+        '''
+        Play back a script of
+        * `ms`: run for that many milliseconds,
+        * `(key_number, pressed)`: a key event,
+        * `('turn', encoder, steps)`: turn an encoder,
+        * `('push', encoder)`: click an encoder button.
+        '''
+        for item in script:
+            if isinstance(item, int):
+                self.run(item)
+            elif item[0] == 'turn':
+                self.turn(item[1], item[2])
+            elif item[0] == 'push':
+                self.push(item[1])
+            else:
+                self.event(item[0], item[1])
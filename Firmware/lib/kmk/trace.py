@@ -0,0 +1,248 @@
+'''
+Optional binary event trace.
+
+Records the key pipeline's events as fixed-size records in a preallocated
+ring, cheap enough to leave running on a production board, and streams them
+over `usb_cdc.data` on request. `usb_cdc.data` has to be enabled in `boot.py`,
+i.e. `usb_cdc.enable(console=True, data=True)`.
+Enable it with `keyboard.event_trace = TraceRecorder()`. A dump is started by
+the `TRACE_DUMP` key or by the host writing `D` to the data port (`C` clears
+the trace), and is decoded on the host with `python -m kmk.trace_decode`.
+
+Dump format, little endian: the header `KMKT`, version (u8), record size (u8),
+record count (u16), dropped records (u32), current ticks (u32) and the length
+of the name table (u16); then the records, oldest first, each: ticks (u32),
+event (u8), module index (u8), int_coord (u16) and key id (u16); then the name
+table: module class names, an empty line, and key names, one per line.
+Timeouts are recorded in the int_coord field; those that don't fit are
+saturated and flagged `CLAMPED`. Keys beyond the first `keys` seen share the
+id `OTHER`.
+'''
+
+from micropython import const
+from supervisor import ticks_ms
+
+from struct import pack, pack_into
+
+from kmk.keys import make_key
+from kmk.scheduler import create_task
+from kmk.utils import Debug
+
+debug = Debug(__name__)
+
+_VERSION = const(2)
+_RECORD = '<IBBHH'
+_RECORD_SIZE = const(10)
+_HEADER = '<4sBBHIIH'
+_CHUNK_SIZE = const(64)
+_POLL_MS = const(10)
+
+# Events. The low bit flags key releases, or HID sends that didn't change any
+# report, the next one timeouts that were clamped.
+MATRIX = const(0x10)
+RESUME = const(0x20)
+INTERCEPT = const(0x30)
+TIMEOUT_SET = const(0x40)
+TIMEOUT = const(0x50)
+HID_SEND = const(0x60)
+RELEASED = const(0x01)
+UNCHANGED = const(0x01)
+CLAMPED = const(0x02)
+
+NONE = const(0xFFFF)
+OTHER = const(0xFFFE)
+_NO_MODULE = const(0xFF)
+
+
+class TraceRecorder:
+    def __init__(self, size: int = 512, keys: int = 128):
+        self.size = size
+        self.keys = min(keys, OTHER)
+        self.dropped = 0
+        self._ring = bytearray(size * _RECORD_SIZE)
+        self._head = 0
+        self._len = 0
+        self._keys = {}
+        self._key_names = []
+        self._keyboard = None
+        self._task = None
+        self._dump = None
+        # The key of the last matrix event or replay, which timeouts are
+        # attributed to.
+        self._current = None
+
+        make_key(names=('TRACE_DUMP',), on_press=lambda *args: self.dump())
+        make_key(names=('TRACE_CLEAR',), on_press=lambda *args: self.clear())
+
+    def attach(self, keyboard) -> None:
+        self._keyboard = keyboard
+        if self._task is None:
+            self._task = create_task(self._poll, period_ms=_POLL_MS)
+
+    def key_id(self, key) -> int:
+        '''
+        Small integer identifying `key`, assigned on first sight. Once the table
+        is full, new keys are all `OTHER`.
+        '''
+        if key is None:
+            return NONE
+        try:
+            return self._keys[key]
+        except KeyError:
+            pass
+        idx = len(self._key_names)
+        if idx >= self.keys:
+            return OTHER
+        self._keys[key] = idx
+        self._key_names.append(key)
+        return idx
+
+    def module_id(self, module) -> int:
+        try:
+            return self._keyboard._module_index[module]
+        except (AttributeError, KeyError):
+            return _NO_MODULE
+
+    def record(
+        self, event: int, key=None, int_coord=None, module: int = _NO_MODULE
+    ) -> None:
+        if self._dump is not None:
+            self.dropped += 1
+            return
+
+        size = self.size
+        if self._len < size:
+            idx = (self._head + self._len) % size
+            self._len += 1
+        else:
+            # Overwrite the oldest record.
+            idx = self._head
+            self._head = (self._head + 1) % size
+            self.dropped += 1
+
+        pack_into(
+            _RECORD,
+            self._ring,
+            idx * _RECORD_SIZE,
+            ticks_ms(),
+            event,
+            module,
+            NONE if int_coord is None else int_coord,
+            self.key_id(key),
+        )
+
+    def matrix(self, key, is_pressed: bool, int_coord: int) -> None:
+        self._current = key
+        self.record(MATRIX if is_pressed else MATRIX | RELEASED, key, int_coord)
+
+    def resume(self, key, is_pressed: bool, int_coord, index: int) -> None:
+        self._current = key
+        self.record(RESUME if is_pressed else RESUME | RELEASED, key, int_coord, index)
+
+    def intercept(self, module, key, is_pressed: bool, int_coord) -> None:
+        self.record(
+            INTERCEPT if is_pressed else INTERCEPT | RELEASED,
+            key,
+            int_coord,
+            self.module_id(module),
+        )
+
+    def hid_send(self, sent: bool) -> None:
+        self.record(HID_SEND if sent else HID_SEND | UNCHANGED)
+
+    def timeout(self, after_ms: int, callback):
+        '''
+        Record setting a timeout of `after_ms`, attributed to the current key,
+        and wrap `callback` to record it firing.
+        '''
+        key = self._current
+        # Longer timeouts don't fit the u16 field, 0xFFFF stands for no value.
+        clamped = 0
+        if after_ms >= NONE:
+            after_ms = NONE - 1
+            clamped = CLAMPED
+        elif after_ms < 0:
+            after_ms = 0
+        self.record(TIMEOUT_SET | clamped, key, after_ms)
+
+        def _timeout():
+            self.record(TIMEOUT | clamped, key, after_ms)
+            callback()
+
+        return _timeout
+
+    def clear(self) -> None:
+        if self._dump is not None:
+            return
+        self._head = 0
+        self._len = 0
+        self.dropped = 0
+
+    def dump(self) -> None:
+        '''Start streaming the trace over `usb_cdc.data`.'''
+        import usb_cdc
+
+        if usb_cdc.data is None:
+            if debug.enabled:
+                debug('usb_cdc.data is not enabled')
+            return
+        if self._dump is None:
+            self._dump = self._chunks()
+
+    def _chunks(self):
+        names = []
+        if self._keyboard is not None:
+            names.extend(m.__class__.__name__ for m in self._keyboard.modules)
+        names.append('')
+        names.extend(repr(key) for key in self._key_names)
+        names = '\n'.join(names).encode()
+
+        yield pack(
+            _HEADER,
+            b'KMKT',
+            _VERSION,
+            _RECORD_SIZE,
+            self._len,
+            self.dropped,
+            ticks_ms(),
+            len(names),
+        )
+
+        ring = memoryview(self._ring)
+        start = self._head * _RECORD_SIZE
+        end = start + self._len * _RECORD_SIZE
+        wrap = len(self._ring)
+        while start < end:
+            stop = min(end, start + _CHUNK_SIZE, wrap if start < wrap else end)
+            if start < wrap:
+                yield ring[start:stop]
+            else:
+                yield ring[start - wrap : stop - wrap]
+            start = stop
+
+        for idx in range(0, len(names), _CHUNK_SIZE):
+            yield names[idx : idx + _CHUNK_SIZE]
+
+    def _poll(self) -> None:
+        import usb_cdc
+
+        data = usb_cdc.data
+        if data is None:
+            return
+
+        if self._dump is None:
+            if data.in_waiting:
+                request = data.read(1)
+                if request == b'D':
+                    self.dump()
+                elif request == b'C':
+                    self.clear()
+            return
+
+        # Only write what fits, so streaming never blocks the main loop.
+        if data.out_waiting:
+            return
+        try:
+            data.write(next(self._dump))
+        except StopIteration:
+            self._dump = None
@@ -0,0 +1,262 @@
+'''
+Host-side decoder for dumps of `kmk.trace.TraceRecorder`.
+
+    python -m kmk.trace_decode dump.bin [-o trace.json] [--text]
+    python -m kmk.trace_decode --port /dev/ttyACM1 [-o trace.json] [--raw dump.bin]
+
+Reads a dump from a file, or requests one over the keyboard's `usb_cdc.data`
+port (needs `pyserial`), and converts it to the Chrome trace event format, to
+be opened in `chrome://tracing` or https://ui.perfetto.dev, or to a plain text
+timeline with `--text`.
+
+This runs on the host, not on the keyboard.
+'''
+
+import argparse
+import json
+import struct
+import sys
+
+# Has to match `kmk.trace`.
+_RECORD = '<IBBHH'
+_HEADER = '<4sBBHIIH'
+_VERSION = 2
+_TICKS_PERIOD = 1 << 29
+
+MATRIX = 0x10
+RESUME = 0x20
+INTERCEPT = 0x30
+TIMEOUT_SET = 0x40
+TIMEOUT = 0x50
+HID_SEND = 0x60
+FLAG = 0x01
+CLAMPED = 0x02
+NONE = 0xFFFF
+OTHER = 0xFFFE
+_NO_MODULE = 0xFF
+
+_EVENT_NAMES = {
+    MATRIX: 'press',
+    MATRIX | FLAG: 'release',
+    RESUME: 'resume press',
+    RESUME | FLAG: 'resume release',
+    INTERCEPT: 'intercept press',
+    INTERCEPT | FLAG: 'intercept release',
+    TIMEOUT_SET: 'timeout set',
+    TIMEOUT: 'timeout',
+    HID_SEND: 'hid send',
+    HID_SEND | FLAG: 'hid unchanged',
+}
+
+# Chrome trace threads.
+_THREADS = {
+    MATRIX: (1, 'matrix'),
+    RESUME: (2, 'resume buffer'),
+    INTERCEPT: (3, 'modules'),
+    TIMEOUT_SET: (4, 'timeouts'),
+    TIMEOUT: (4, 'timeouts'),
+    HID_SEND: (5, 'hid'),
+}
+
+
+class Trace:
+    def __init__(self, records, dropped, modules, keys):
+        self.records = records
+        self.dropped = dropped
+        self.modules = modules
+        self.keys = keys
+
+    def module_name(self, module):
+        if module == _NO_MODULE:
+            return None
+        try:
+            return self.modules[module]
+        except IndexError:
+            # Events resumed after the last module.
+            return 'keyboard'
+
+    def key_name(self, key):
+        if key == NONE:
+            return None
+        if key == OTHER:
+            return 'other'
+        try:
+            return self.keys[key]
+        except IndexError:
+            return f'key {key}'
+
+
+def decode(data: bytes) -> Trace:
+    header_size = struct.calcsize(_HEADER)
+    magic, version, record_size, count, dropped, _, names_len = struct.unpack_from(
+        _HEADER, data
+    )
+    if magic != b'KMKT':
+        raise ValueError('not a KMK trace dump')
+    if version != _VERSION:
+        raise ValueError(f'unsupported trace version {version}')
+
+    records = []
+    offset = header_size
+    base = 0
+    last = None
+    for _ in range(count):
+        ticks, event, module, coord, key = struct.unpack_from(_RECORD, data, offset)
+        offset += record_size
+        # Unwrap `ticks_ms` into milliseconds since the first record.
+        if last is not None and ticks < last:
+            base += _TICKS_PERIOD
+        last = ticks
+        records.append((base + ticks, event, module, coord, key))
+
+    if records:
+        start = records[0][0]
+        records = [(t - start,) + tuple(rest) for t, *rest in records]
+
+    names = data[offset : offset + names_len].decode().split('\n')
+    split = names.index('') if '' in names else len(names)
+    return Trace(records, dropped, names[:split], names[split + 1 :])
+
+
+def to_chrome(trace: Trace) -> dict:
+    '''Convert to the Chrome trace event format, timestamps in microseconds.'''
+    events = []
+    for tid, name in sorted(set(_THREADS.values())):
+        events.append(
+            {
+                'ph': 'M',
+                'pid': 0,
+                'tid': tid,
+                'name': 'thread_name',
+                'args': {'name': name},
+            }
+        )
+
+    held = {}
+    for ms, event, module, coord, key in trace.records:
+        ts = ms * 1000
+        clamped = event & CLAMPED
+        event &= ~CLAMPED
+        tid = _THREADS.get(event & ~FLAG, (0, ''))[0]
+        args = {}
+        if key != NONE:
+            args['key'] = trace.key_name(key)
+        if event in (TIMEOUT_SET, TIMEOUT):
+            args['after_ms'] = coord
+            if clamped:
+                args['clamped'] = True
+        elif coord != NONE:
+            args['int_coord'] = coord
+        if event & ~FLAG in (RESUME, INTERCEPT) and module != _NO_MODULE:
+            args['module'] = trace.module_name(module)
+        events.append(
+            {
+                'ph': 'i',
+                's': 't',
+                'pid': 0,
+                'tid': tid,
+                'ts': ts,
+                'name': _EVENT_NAMES.get(event, hex(event)),
+                'args': args,
+            }
+        )
+
+        # Key holds as spans on the matrix thread.
+        if event == MATRIX:
+            held[coord] = (ts, args.get('key'))
+        elif event == MATRIX | FLAG and coord in held:
+            start, name = held.pop(coord)
+            events.append(
+                {
+                    'ph': 'X',
+                    'pid': 0,
+                    'tid': 10 + coord,
+                    'ts': start,
+                    'dur': ts - start,
+                    'name': name or str(coord),
+                }
+            )
+
+    return {
+        'traceEvents': events,
+        'displayTimeUnit': 'ms',
+        'otherData': {'dropped': trace.dropped},
+    }
+
+
+def to_text(trace: Trace) -> str:
+    lines = []
+    if trace.dropped:
+        lines.append(f'({trace.dropped} records dropped)')
+    for ms, event, module, coord, key in trace.records:
+        clamped = event & CLAMPED
+        event &= ~CLAMPED
+        line = f'{ms:>8} {_EVENT_NAMES.get(event, hex(event)):<18}'
+        if key != NONE:
+            line += f' {trace.key_name(key)}'
+        if event in (TIMEOUT_SET, TIMEOUT):
+            line += f' after {">=" if clamped else ""}{coord}ms'
+        elif coord != NONE:
+            line += f' @{coord}'
+        if event & ~FLAG in (RESUME, INTERCEPT) and module != _NO_MODULE:
+            line += f' [{trace.module_name(module)}]'
+        lines.append(line.rstrip())
+    return '\n'.join(lines)
+
+
+def read_port(port: str, timeout: float = 2.0) -> bytes:
+    '''Request a dump over the keyboard's data port.'''
+    try:
+        import serial
+    except ImportError:
+        raise SystemExit('reading from a serial port requires pyserial')
+
+    with serial.Serial(port, timeout=timeout) as conn:
+        conn.reset_input_buffer()
+        conn.write(b'D')
+        header = conn.read(struct.calcsize(_HEADER))
+        if len(header) != struct.calcsize(_HEADER):
+            raise SystemExit('no response from the keyboard')
+        _, _, record_size, count, _, _, names_len = struct.unpack(_HEADER, header)
+        size = count * record_size + names_len
+        body = conn.read(size)
+        if len(body) != size:
+            raise SystemExit('incomplete dump')
+        return header + body
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m kmk.trace_decode')
+    parser.add_argument('dump', nargs='?', help='file containing a raw dump')
+    parser.add_argument('--port', help='request a dump over this serial port')
+    parser.add_argument('--raw', help='save the raw dump read from --port')
+    parser.add_argument('-o', '--output', help='write the result to this file')
+    parser.add_argument('--text', action='store_true', help='plain text timeline')
+    args = parser.parse_args(argv)
+
+    if args.port:
+        data = read_port(args.port)
+        if args.raw:
+            with open(args.raw, 'wb') as f:
+                f.write(data)
+    elif args.dump:
+        with open(args.dump, 'rb') as f:
+            data = f.read()
+    else:
+        parser.error('either a dump file or --port is required')
+
+    trace = decode(data)
+    if args.text:
+        result = to_text(trace) + '\n'
+    else:
+        result = json.dumps(to_chrome(trace), indent=1)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(result)
+    else:
+        sys.stdout.write(result)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,47 +3,169 @@ try:
 except ImportError:
     pass
 
+from micropython import const
 from supervisor import ticks_ms
 
 from usb_cdc import console
 
+from kmk.kmktime import ticks_diff
+from kmk.ringbuffer import RingBuffer
+
 
 def clamp(x: int, bottom: int = 0, top: int = 100) -> int:
     return min(max(bottom, x), top)
 
 
+# Messages are formatted when they're logged and kept until the console has
+# room for them: logging never waits on the serial connection.
+_BUFFER_SIZE = const(32)
+# Messages written per flush, to bound the time spent in `print`.
+_FLUSH_BATCH = const(4)
+# How often the console connection is checked when debug is auto-detected.
+_DETECT_INTERVAL_MS = const(1000)
+
+_LEVEL_PREFIX = ('', 'INFO: ', 'WARNING: ', 'ERROR: ')
+
+
+class _Message:
+    def __init__(self):
+        self.ticks = 0
+        self.name = None
+        self.level = 0
+        self.text = None
+
+
+def _console_connected() -> bool:
+    return bool(console and console.connected)
+
+
+def _write(ticks: int, name: str, level: int, text: str) -> None:
+    print(ticks, ' ', name, ': ', _LEVEL_PREFIX[level], text, sep='')
+
+
+_buffer = RingBuffer(_BUFFER_SIZE, _Message)
+# Messages are written right away until the keyboard starts buffering them at
+# the end of its initialization.
+_buffering = False
 _debug_enabled = None
+_detected = _console_connected()
+_detected_at = ticks_ms()
 
 
 class Debug:
     '''default usage:
     debug = Debug(__name__)
+
+    Once the keyboard is initialized, messages are buffered and written to the
+    console by `Debug.flush()`, which the keyboard calls once per main loop
+    iteration; before that they're written right away. Messages below
+    `Debug.level` are discarded, messages that don't fit the buffer are dropped
+    and counted.
     '''
 
+    DEBUG = const(0)
+    INFO = const(1)
+    WARNING = const(2)
+    ERROR = const(3)
+
+    level = DEBUG
+
     def __init__(self, name: str = __name__):
         self.name = name
 
     def __call__(self, *message: str, name: Optional[str] = None) -> None:
-        if not name:
-            name = self.name
-        print(ticks_ms(), end=' ')
-        print(name, end=': ')
-        print(*message, sep='')
+        self._log(Debug.DEBUG, message, name)
+
+    def info(self, *message: str, name: Optional[str] = None) -> None:
+        self._log(Debug.INFO, message, name)
+
+    def warning(self, *message: str, name: Optional[str] = None) -> None:
+        self._log(Debug.WARNING, message, name)
+
+    def error(self, *message: str, name: Optional[str] = None) -> None:
+        self._log(Debug.ERROR, message, name)
+
+    def _log(self, level: int, message: tuple, name: Optional[str]) -> None:
+        if level < Debug.level:
+            return
+        if not _buffering:
+            _write(
+                ticks_ms(),
+                name or self.name,
+                level,
+                ''.join([str(part) for part in message]),
+            )
+            return
+        slot = _buffer.push()
+        if slot is None:
+            return
+        slot.ticks = ticks_ms()
+        slot.name = name or self.name
+        slot.level = level
+        slot.text = ''.join([str(part) for part in message])
 
     @property
     def enabled(self) -> bool:
-        global _debug_enabled
-        if (
-            _debug_enabled is None
-            and console
-            and console.connected
-            and console.out_waiting == 0
-        ):
-            return True
-        return bool(_debug_enabled)
+        if _debug_enabled is None:
+            return _detected
+        return _debug_enabled
 
     @enabled.setter
     def enabled(self, enabled: bool):
         global _debug_enabled
         _debug_enabled = enabled
-        self('debug.enabled=', enabled)
+        if enabled:
+            self('debug.enabled=', enabled)
+
+    @staticmethod
+    def buffer(enabled: bool = True) -> None:
+        '''Start or stop buffering messages, writing out the buffered ones.'''
+        global _buffering
+        if not enabled:
+            Debug.flush(force=True)
+        _buffering = enabled
+
+    @staticmethod
+    def flush(force: bool = False) -> None:
+        '''
+        Write buffered messages while the console's output buffer is empty, at
+        most a few per call. `force` writes all of them regardless.
+        '''
+        global _detected, _detected_at
+
+        now = ticks_ms()
+        if _debug_enabled is None and (
+            ticks_diff(now, _detected_at) >= _DETECT_INTERVAL_MS
+        ):
+            _detected = _console_connected()
+            _detected_at = now
+
+        if not _buffer and not _buffer.overflows:
+            return
+
+        if force:
+            budget = len(_buffer)
+        elif _console_connected() and console.out_waiting:
+            return
+        else:
+            budget = _FLUSH_BATCH
+
+        if _buffer.overflows:
+            print(now, ' kmk.utils: ', _buffer.overflows, ' messages dropped', sep='')
+            _buffer.overflows = 0
+
+        while budget and _buffer:
+            message = _buffer.pop()
+            _write(message.ticks, message.name, message.level, message.text)
+            message.text = None
+            budget -= 1
+
+
+debug = Debug(__name__)
+
+
+def debug_error(module, message: str, error: Exception):
+    if debug.enabled:
+        debug.error(
+            message, ': ', error.__class__.__name__, ': ', error, name=module.__module__
+        )